@@ -19,9 +19,16 @@ type Stats = {
   citiesData: CitiesData;
 };
 
-type AirspaceCarbonResponse = {
-  airspace_name: string;
-  total: number;
+type AirspaceSummaryResponse = {
+  airspaces: {
+    [airspace: string]: {
+      bounding_box: number[];
+      total: number;
+      data: {
+        [timestamp: string]: number;
+      };
+    };
+  };
 };
 
 type CelebLeaderboardResponse = {
@@ -39,13 +46,6 @@ type ServerStart = {
   timestamp: number;
 };
 
-type CitiesDataResponse = {
-  airspace_name: string;
-  data: {
-    [key: string]: number;
-  };
-};
-
 export type CitiesData = {
   [city: string]: {
     [timestamp: string]: number;
@@ -72,19 +72,22 @@ export async function loader({
   //   API_URL = `http://127.0.0.1:8000/api`;
   // }
 
-  const totalCO2KgReponse = await fetch(
-    `${API_URL}/${city?.toLowerCase()}/total`
+  // Totals and carbon data of all airspaces are loaded in a single request
+  const summaryResponse = await fetch(
+    `${API_URL}/summary?airspaces=${airspaceOptions
+      .map(decapitalizeFirstLetter)
+      .join(",")}`
   );
   const celebLeaderboardResponse = await fetch(`${API_URL}/leaderboard`);
   const serverstartResponse = await fetch(`${API_URL}/serverstart`);
 
-  if (!totalCO2KgReponse || !celebLeaderboardResponse || !serverstartResponse) {
+  if (!summaryResponse || !celebLeaderboardResponse || !serverstartResponse) {
     throw new Response("Internal Server Error", {
       status: 500,
     });
   }
 
-  const totalCO2Kg = (await totalCO2KgReponse.json()) as AirspaceCarbonResponse;
+  const summary = (await summaryResponse.json()) as AirspaceSummaryResponse;
   const serverstart = (await serverstartResponse.json()) as ServerStart;
   const { timestamp: serverstartTimestamp } = serverstart;
 
@@ -97,22 +100,17 @@ export async function loader({
     emissionsInKg: emissions,
   }));
 
-  const citiesDataPromises = airspaceOptions.map(async (city) => {
-    const response = await fetch(
-      `${API_URL}/${decapitalizeFirstLetter(city)}/data`
-    );
-    const data = (await response.json()) as CitiesDataResponse;
-    return data;
-  });
-  const citiesDataReponse = await Promise.all(citiesDataPromises);
-  const citiesData = citiesDataReponse.reduce((acc, item) => {
-    acc[item.airspace_name] = item.data;
-    return acc;
-  }, {} as CitiesData);
+  const citiesData = Object.entries(summary.airspaces).reduce(
+    (acc, [airspace, item]) => {
+      acc[airspace] = item.data;
+      return acc;
+    },
+    {} as CitiesData
+  );
 
   return json({
     location: city! as AirspaceOption,
-    totalLocationCO2KG: totalCO2Kg.total,
+    totalLocationCO2KG: summary.airspaces[city!.toLowerCase()]?.total ?? 0,
     serverstart: serverstartTimestamp,
     leaderboardContent: celebLeaderboard,
     citiesData,
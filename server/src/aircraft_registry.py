@@ -0,0 +1,204 @@
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from geodesy import haversine_km_batch
+
+DistanceFunction = Callable[
+    [Sequence[Tuple[float, float]], Sequence[Tuple[float, float]]], List[float]
+]
+
+
+def _contains(
+    outer: Tuple[float, float, float, float], inner: Tuple[float, float, float, float]
+) -> bool:
+    """Returns whether the bounding box outer contains the bounding box inner."""
+    return (
+        outer[0] <= inner[0]
+        and outer[1] <= inner[1]
+        and outer[2] >= inner[2]
+        and outer[3] >= inner[3]
+    )
+
+
+class AircraftRegistry:
+    """Process-wide registry of aircraft states shared by overlapping airspaces.
+
+    Every carbon computation ingests its current aircrafts into the registry,
+    which replaces equal states by the single state already registered for the
+    icao24. Airspaces containing the same aircraft therefore hold references to
+    the same state, and the distance between two states of an aircraft is only
+    computed once, however many airspaces track it.
+
+    The registry also keeps the latest states response of every polled bounding
+    box, so airspaces within a recently polled bounding box do not need to
+    request their states from the OpenSky Network again.
+
+    All methods are thread safe.
+
+    Args:
+        distance_function (Callable): Function returning the distances in km
+            between pairs of positions. Defaults to the haversine formula.
+    """
+
+    def __init__(self, distance_function: DistanceFunction = haversine_km_batch) -> None:
+        self.distance_function = distance_function
+        self.lock = Lock()
+        self.states: Dict[str, Dict[str, Any]] = {}
+        # latest segment of every aircraft as (previous state, state, distance)
+        self.segments: Dict[str, Tuple[Dict[str, Any], Dict[str, Any], float]] = {}
+        self.snapshots: Dict[
+            Tuple[float, float, float, float], Tuple[int, Dict[str, Dict[str, Any]]]
+        ] = {}
+
+    def ingest(
+        self,
+        current_aircrafts: Dict[str, Dict[str, Any]],
+        expiry_time: Optional[int] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Registers the current states of aircrafts.
+
+        States are treated as immutable, neither the given nor the returned states
+        may be modified afterwards.
+
+        Args:
+            current_aircrafts (Dict[str, Dict[str, Any]]): Transformed state vectors
+                of the current aircrafts of an airspace.
+            expiry_time (int, optional): States last updated before this time are
+                removed from the registry.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: The current aircrafts with every state
+                equal to the registered state of the aircraft replaced by it.
+        """
+        registered_aircrafts = {}
+        with self.lock:
+            for icao24, state in current_aircrafts.items():
+                registered = self.states.get(icao24)
+                if registered is not None and registered == state:
+                    state = registered
+                elif (
+                    registered is None or state["last_update"] > registered["last_update"]
+                ):
+                    self.states[icao24] = state
+                registered_aircrafts[icao24] = state
+
+            if expiry_time is not None:
+                self._evict(expiry_time)
+        return registered_aircrafts
+
+    def _evict(self, expiry_time: int) -> None:
+        """Removes states and segments of aircrafts not updated since expiry_time."""
+        expired = [
+            icao24
+            for icao24, state in self.states.items()
+            if state["last_update"] < expiry_time
+        ]
+        for icao24 in expired:
+            del self.states[icao24]
+            self.segments.pop(icao24, None)
+
+    def get_segment_distances(
+        self,
+        icao24s: List[str],
+        previous_states: List[Dict[str, Any]],
+        current_states: List[Dict[str, Any]],
+    ) -> List[float]:
+        """Returns the distances flown by aircrafts between two of their states.
+
+        Args:
+            icao24s (List[str]): The icao24 codes of the aircrafts.
+            previous_states (List[Dict[str, Any]]): Previous state of every aircraft.
+            current_states (List[Dict[str, Any]]): Current state of every aircraft.
+
+        Returns:
+            List[float]: Distance in km of every aircraft.
+        """
+        distances: List[float] = [0.0] * len(icao24s)
+        missing = []
+        with self.lock:
+            for index, (icao24, previous, current) in enumerate(
+                zip(icao24s, previous_states, current_states)
+            ):
+                segment = self.segments.get(icao24)
+                if (
+                    segment is not None
+                    and segment[0] is previous
+                    and segment[1] is current
+                ):
+                    distances[index] = segment[2]
+                else:
+                    missing.append(index)
+
+        computed = self.distance_function(
+            [previous_states[index]["position"] for index in missing],
+            [current_states[index]["position"] for index in missing],
+        )
+
+        with self.lock:
+            for index, distance in zip(missing, computed):
+                distances[index] = distance
+                self.segments[icao24s[index]] = (
+                    previous_states[index],
+                    current_states[index],
+                    distance,
+                )
+        return distances
+
+    def add_snapshot(
+        self,
+        bounding_box: Tuple[float, float, float, float],
+        request_time: int,
+        current_aircrafts: Dict[str, Dict[str, Any]],
+    ) -> None:
+        """Keeps the states response of a bounding box for other airspaces.
+
+        Args:
+            bounding_box (Tuple): The requested bounding box.
+            request_time (int): The time of the states response in seconds since epoch.
+            current_aircrafts (Dict[str, Dict[str, Any]]): Transformed state vectors
+                of the response.
+        """
+        with self.lock:
+            self.snapshots[bounding_box] = (request_time, current_aircrafts)
+
+    def get_snapshot(
+        self, bounding_box: Tuple[float, float, float, float], min_request_time: int
+    ) -> Optional[Tuple[int, Dict[str, Dict[str, Any]]]]:
+        """Returns the states within a bounding box from a recent snapshot.
+
+        Args:
+            bounding_box (Tuple): The bounding box of the airspace.
+            min_request_time (int): Snapshots of responses before this time are not
+                used.
+
+        Returns:
+            Optional[Tuple[int, Dict]]: Request time and transformed state vectors
+                of the aircrafts within the bounding box of the latest snapshot
+                containing it, or None if there is none.
+        """
+        with self.lock:
+            candidates = [
+                (request_time, snapshot_box, current_aircrafts)
+                for snapshot_box, (
+                    request_time,
+                    current_aircrafts,
+                ) in self.snapshots.items()
+                if request_time >= min_request_time
+                and _contains(snapshot_box, bounding_box)
+            ]
+        if not candidates:
+            return None
+
+        request_time, snapshot_box, current_aircrafts = max(
+            candidates, key=lambda candidate: candidate[0]
+        )
+        if snapshot_box == bounding_box:
+            return request_time, current_aircrafts
+
+        lamin, lomin, lamax, lomax = bounding_box
+        return request_time, {
+            icao24: state
+            for icao24, state in current_aircrafts.items()
+            if lamin <= state["position"][0] <= lamax
+            and lomin <= state["position"][1] <= lomax
+        }
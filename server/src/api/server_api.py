@@ -1,12 +1,181 @@
-import uvicorn
-from fastapi import FastAPI
+import asyncio
+import json
+import math
+import time
+from fastapi import FastAPI, HTTPException, Query, Response
 from pydantic import BaseModel
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from argparse import ArgumentParser
-from typing import Tuple, Dict, Optional
+from typing import Any, Awaitable, Callable, Hashable, Tuple, Dict, List, Optional, Type
 from datetime import datetime
 
-from database import Database, RedisDatabase, DatabaseError
+from database import Database, DatabaseError, create_database
+from profiling import Profiler
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+
+# Seconds the state snapshots and custom area results derived from them are reused
+SNAPSHOT_CACHE_SECONDS = 5
+
+# Grid in degrees custom areas are expanded to, so that close areas share results
+AREA_GRID_DEGREES = 0.01
+
+# Maximum number of cached custom area results
+AREA_CACHE_SIZE = 4096
+
+# Assumed fuel consumption in kg per km and CO2 per kg of fuel of the computation
+FUEL_CONSUMPTION_RATE = 3.0
+CO2_PER_FUEL = 3.16
+
+
+def encode_json(content: Any) -> bytes:
+    """Returns content encoded as JSON, using orjson if it is installed.
+
+    Non-string dictionary keys like timestamps are encoded as strings.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content).encode("utf-8")
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls of coroutine functions with the same key.
+
+    While a call with a key is running, further calls with that key wait for
+    and return its result instead of starting another call.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the result of func, shared with concurrent calls of key."""
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self.calls[key] = future
+            future.add_done_callback(
+                lambda done: (
+                    self.calls.pop(key, None) if self.calls.get(key) is done else None
+                )
+            )
+        # a cancelled request must not cancel the call of the other requests
+        return await asyncio.shield(future)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests of routes on request of a profiler.
+
+    Requests are profiled as route:PATH with the path of their route, e.g.
+    route:/api/{airspace}/total. The profiling request is read at most every
+    poll interval of the profiler. Since all requests are served by the thread of
+    the event loop, profiles of a request include concurrent requests.
+
+    Args:
+        app (ASGIApp): The application serving the requests.
+        profiler (Profiler): Profiler of the requests.
+        routes (List[BaseRoute]): Routes of the application.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: Profiler, routes: List[BaseRoute]) -> None:
+        self.app = app
+        self.profiler = profiler
+        self.routes = routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serves a request, profiled if its route is requested."""
+        if scope["type"] == "http":
+            if self.profiler.claim_refresh():
+                await asyncio.to_thread(self.profiler.refresh)
+            if self.profiler.targets:
+                with self.profiler.profile(f"route:{self.get_route_path(scope)}"):
+                    await self.app(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    def get_route_path(self, scope: Scope) -> str:
+        """Returns the path of the route of a request, its own path if none matches."""
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return str(getattr(route, "path", scope["path"]))
+        return str(scope["path"])
+
+
+def quantize_bounding_box(
+    bounding_box: Tuple[float, float, float, float],
+) -> Tuple[int, int, int, int]:
+    """Returns the grid cells of the smallest grid aligned box containing a box."""
+    lamin, lomin, lamax, lomax = bounding_box
+    return (
+        math.floor(lamin / AREA_GRID_DEGREES),
+        math.floor(lomin / AREA_GRID_DEGREES),
+        math.ceil(lamax / AREA_GRID_DEGREES),
+        math.ceil(lomax / AREA_GRID_DEGREES),
+    )
+
+
+def get_area_emission_rate(
+    bounding_box: Tuple[float, float, float, float],
+    airspaces: Dict[str, Tuple],
+    state_snapshots: Dict[str, Tuple[int, Dict[str, Dict[str, Any]]]],
+) -> Dict[str, Any]:
+    """Returns the current carbon emission rate within a bounding box.
+
+    Only aircrafts of state snapshots of airspaces overlapping the bounding box
+    are known. Aircrafts contained in several snapshots are counted once with
+    their latest state.
+
+    Args:
+        bounding_box (Tuple): Bounding box of the area.
+        airspaces (Dict[str, Tuple]): Bounding boxes of the airspaces.
+        state_snapshots (Dict[str, Tuple[int, Dict]]): Request time and
+            transformed state vectors of the airspaces.
+
+    Returns:
+        Dict[str, Any]: The overlapping airspaces, the time of their oldest
+            snapshot, the number of flying aircrafts and their carbon emission
+            in kg per hour.
+    """
+    lamin, lomin, lamax, lomax = bounding_box
+    overlapping = [
+        airspace
+        for airspace, (a_lamin, a_lomin, a_lamax, a_lomax) in airspaces.items()
+        if airspace in state_snapshots
+        and a_lamin < lamax
+        and lamin < a_lamax
+        and a_lomin < lomax
+        and lomin < a_lomax
+    ]
+
+    aircrafts: Dict[str, Dict[str, Any]] = {}
+    for airspace in overlapping:
+        for icao24, state in state_snapshots[airspace][1].items():
+            latitude, longitude = state["position"]
+            if not (lamin <= latitude <= lamax and lomin <= longitude <= lomax):
+                continue
+            known = aircrafts.get(icao24)
+            if known is None or state["last_update"] > known["last_update"]:
+                aircrafts[icao24] = state
+
+    flying = [state for state in aircrafts.values() if not state["on_ground"]]
+    # velocity in m/s converted to km per hour
+    distance_per_hour = sum(state["velocity"] for state in flying) * 3.6
+    return {
+        "bounding_box": bounding_box,
+        "airspaces": overlapping,
+        "time": min(
+            (state_snapshots[airspace][0] for airspace in overlapping), default=0
+        ),
+        "aircrafts": len(flying),
+        "emission_rate": distance_per_hour * FUEL_CONSUMPTION_RATE * CO2_PER_FUEL,
+    }
 
 
 class FastAPIWithDatabase:
@@ -16,15 +185,83 @@ class FastAPIWithDatabase:
         db (Database): Database object as data storage.
         host (str): Host address for the FastAPI application. Default: "127.0.0.1".
         port (int): Port for the FastAPI application. Default: 8000.
+        fast_json (bool): Whether to skip validation of the data from the database
+            and return pre-encoded JSON responses. Default: False.
+        profiler (Profiler, optional): Profiler of the routes. Routes are not
+            profiled if None.
     """
 
-    def __init__(self, db: Database, host: str = "0.0.0.0", port: int = 8000) -> None:
+    def __init__(
+        self,
+        db: Database,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        fast_json: bool = False,
+        profiler: Optional[Profiler] = None,
+    ) -> None:
         self.app = FastAPI()
+        if profiler is not None:
+            self.app.add_middleware(
+                ProfilingMiddleware, profiler=profiler, routes=self.app.routes
+            )
         self.host = host
         self.port = port
         self.db = db
+        self.fast_json = fast_json
+        self.single_flight = SingleFlight()
+        # load time, airspaces and state snapshots of the database
+        self.state_snapshots: Optional[Tuple[float, Dict, Dict]] = None
+        self.area_cache: Dict[Tuple[int, int, int, int], Dict[str, Any]] = {}
         self.register_routes()
 
+    def respond(self, model: Type[BaseModel], **content: Any) -> Any:
+        """Returns the response of a route with given content.
+
+        In fast json mode, the content is encoded directly instead of being
+        validated by the response model and serialized by FastAPI.
+        """
+        if self.fast_json:
+            return Response(content=encode_json(content), media_type="application/json")
+        return model(**content)
+
+    async def get_state_snapshots(self) -> Tuple[float, Dict, Dict]:
+        """Returns the cached airspaces and state snapshots, loaded at most once."""
+        cached = self.state_snapshots
+        if cached is not None and time.monotonic() - cached[0] < SNAPSHOT_CACHE_SECONDS:
+            return cached
+
+        state_snapshots = await self.single_flight.do(
+            "state_snapshots", self._load_state_snapshots
+        )
+        # every request waiting for the load receives the same snapshots
+        if state_snapshots is not self.state_snapshots:
+            self.state_snapshots = state_snapshots
+            self.area_cache = {}
+        return state_snapshots
+
+    async def _load_state_snapshots(self) -> Tuple[float, Dict, Dict]:
+        """Loads airspaces and state snapshots from the database in a thread."""
+        airspaces, state_snapshots = await asyncio.to_thread(
+            lambda: (self.db.get_airspaces(), self.db.get_state_snapshots())
+        )
+        return time.monotonic(), airspaces, state_snapshots
+
+    async def get_area_emission(self, cells: Tuple[int, int, int, int]) -> Dict[str, Any]:
+        """Returns the cached emission rate of a quantized area."""
+        _, airspaces, state_snapshots = await self.get_state_snapshots()
+        area_emission = self.area_cache.get(cells)
+        if area_emission is None:
+            lamin, lomin, lamax, lomax = (
+                round(cell * AREA_GRID_DEGREES, 6) for cell in cells
+            )
+            area_emission = get_area_emission_rate(
+                (lamin, lomin, lamax, lomax), airspaces, state_snapshots
+            )
+            if len(self.area_cache) >= AREA_CACHE_SIZE:
+                self.area_cache = {}
+            self.area_cache[cells] = area_emission
+        return area_emission
+
     def register_routes(self) -> None:
         """Set specific routes for the FastAPI application."""
 
@@ -34,7 +271,9 @@ class FastAPIWithDatabase:
         @self.app.get("/api/serverstart", response_model=ServerStartModel)
         async def get_server_startup_time() -> ServerStartModel:
             """Return total carbon emmision of given city from database."""
-            return ServerStartModel(timestamp=self.db.get_server_startup_time())
+            return self.respond(
+                ServerStartModel, timestamp=self.db.get_server_startup_time()
+            )
 
         class AirspaceModel(BaseModel):
             airspaces: Dict[str, Tuple]
@@ -42,7 +281,7 @@ class FastAPIWithDatabase:
         @self.app.get("/api/airspaces", response_model=AirspaceModel)
         async def get_airspaces() -> AirspaceModel:
             """Return all supported airspaces with bounding boxes."""
-            return AirspaceModel(airspaces=self.db.get_airspaces())
+            return self.respond(AirspaceModel, airspaces=self.db.get_airspaces())
 
         class TotalCarbonModel(BaseModel):
             airspace_name: str
@@ -51,8 +290,10 @@ class FastAPIWithDatabase:
         @self.app.get("/api/{airspace}/total", response_model=TotalCarbonModel)
         async def get_total_carbon(airspace: str) -> TotalCarbonModel:
             """Return total carbon emmision of given city from database."""
-            return TotalCarbonModel(
-                airspace_name=airspace, total=self.db.get_total_carbon(airspace)
+            return self.respond(
+                TotalCarbonModel,
+                airspace_name=airspace,
+                total=self.db.get_total_carbon(airspace),
             )
 
         class CarbonSequenceModel(BaseModel):
@@ -68,21 +309,124 @@ class FastAPIWithDatabase:
                 begin = 0
             if end is None:
                 end = int(datetime.now().timestamp())
-            return CarbonSequenceModel(
+            return self.respond(
+                CarbonSequenceModel,
                 airspace_name=airspace,
                 data=self.db.get_carbon_sequence(airspace, begin, end),
             )
 
+        @self.app.get("/api/summary")
+        async def get_airspace_summaries(
+            airspaces: Optional[str] = None,
+            points: Optional[int] = Query(None, ge=1),
+        ) -> Response:
+            """Return bounding box, total and latest carbon data of many airspaces.
+
+            Airspaces are given as comma separated names and default to all airspaces.
+            """
+            summaries = self.db.get_airspace_summaries(
+                airspaces.split(",") if airspaces else None, points
+            )
+            return Response(
+                content=encode_json({"airspaces": summaries}),
+                media_type="application/json",
+            )
+
+        class AreaEmissionModel(BaseModel):
+            bounding_box: Tuple[float, float, float, float]
+            airspaces: List[str]
+            time: int
+            aircrafts: int
+            emission_rate: float
+
+        @self.app.get("/api/area/emission", response_model=AreaEmissionModel)
+        async def get_area_emission(
+            lamin: float = Query(..., ge=-90, le=90),
+            lomin: float = Query(..., ge=-180, le=180),
+            lamax: float = Query(..., ge=-90, le=90),
+            lomax: float = Query(..., ge=-180, le=180),
+        ) -> AreaEmissionModel:
+            """Return current carbon emission rate in kg per hour of a custom area.
+
+            The area is expanded to the 0.01 degree grid and computed from the latest
+            states of the watched airspaces, without requests to the OpenSky Network.
+            """
+            if lamin >= lamax or lomin >= lomax:
+                raise HTTPException(status_code=422, detail="Empty bounding box")
+            area_emission = await self.get_area_emission(
+                quantize_bounding_box((lamin, lomin, lamax, lomax))
+            )
+            return self.respond(AreaEmissionModel, **area_emission)
+
+        class AircraftEmissionModel(BaseModel):
+            icao24: str
+            emission: float
+
+        class TopAircraftModel(BaseModel):
+            airspace_name: str
+            aircrafts: List[AircraftEmissionModel]
+
+        @self.app.get("/api/{airspace}/aircraft/top", response_model=TopAircraftModel)
+        async def get_top_aircraft_emissions(
+            airspace: str,
+            count: int = Query(10, ge=1, le=1000),
+            begin: Optional[int] = None,
+            end: Optional[int] = None,
+        ) -> TopAircraftModel:
+            """Return aircrafts with highest carbon emission in given airspace."""
+            if begin is None:
+                begin = 0
+            if end is None:
+                end = int(datetime.now().timestamp())
+            return self.respond(
+                TopAircraftModel,
+                airspace_name=airspace,
+                aircrafts=[
+                    {"icao24": icao24, "emission": emission}
+                    for icao24, emission in self.db.get_top_aircraft_emissions(
+                        airspace, begin, end, count
+                    )
+                ],
+            )
+
+        class AircraftHistoryModel(BaseModel):
+            airspace_name: str
+            icao24: str
+            data: Dict[int, float]
+
+        @self.app.get(
+            "/api/{airspace}/aircraft/{icao24}", response_model=AircraftHistoryModel
+        )
+        async def get_aircraft_emission_history(
+            airspace: str,
+            icao24: str,
+            begin: Optional[int] = None,
+            end: Optional[int] = None,
+        ) -> AircraftHistoryModel:
+            """Return hourly carbon emission of an aircraft in given airspace."""
+            if begin is None:
+                begin = 0
+            if end is None:
+                end = int(datetime.now().timestamp())
+            return self.respond(
+                AircraftHistoryModel,
+                airspace_name=airspace,
+                icao24=icao24,
+                data=self.db.get_aircraft_emission_history(airspace, icao24, begin, end),
+            )
+
         class CelebModel(BaseModel):
             celeb_emission: Dict[str, float]
 
         @self.app.get("/api/leaderboard", response_model=CelebModel)
         async def get_celeb_emission() -> CelebModel:
             """Return dictionary of celebs with their respective emission."""
-            return CelebModel(celeb_emission=self.db.get_celeb_emissions())
+            return self.respond(CelebModel, celeb_emission=self.db.get_celeb_emissions())
 
     def run(self) -> None:
         """Run the FastAPI application with given host and port."""
+        import uvicorn
+
         uvicorn.run(self.app, host=self.host, port=self.port)
 
 
@@ -98,20 +442,51 @@ def argparser() -> ArgumentParser:
 
     parser.add_argument("--db_port", type=int, default=6379)
 
+    parser.add_argument(
+        "--fast_json",
+        action="store_true",
+        help="Return pre-encoded responses without validating the database data",
+    )
+
+    parser.add_argument(
+        "--db_backend",
+        type=str,
+        choices=["redis", "sqlite", "memory"],
+        help="Storage backend, sqlite and memory do not need a running database server",
+        default="redis",
+    )
+
+    parser.add_argument(
+        "--db_path",
+        type=str,
+        help="Path to the database file of the sqlite backend",
+        default="carbon.db",
+    )
+
+    parser.add_argument(
+        "--profile_dir",
+        type=str,
+        help="Directory to write profiles of routes to, requested with profiling.py",
+        default=None,
+    )
+
     return parser
 
 
 def main() -> None:
     """Create and start server-side API."""
     args = argparser().parse_args()
-    db = RedisDatabase(args.db_host, args.db_port)
+    db = create_database(args.db_backend, args.db_host, args.db_port, args.db_path)
 
     try:
         db.is_running()
     except DatabaseError:
         raise RuntimeError("Database connection failed.")
 
-    api = FastAPIWithDatabase(db, args.api_host, args.api_port)
+    # Profile routes on request, if enabled
+    profiler = Profiler(db, args.profile_dir) if args.profile_dir else None
+
+    api = FastAPIWithDatabase(db, args.api_host, args.api_port, args.fast_json, profiler)
     api.run()
 
 
@@ -0,0 +1,277 @@
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from carbon_computation import StateCarbonComputation, get_assumed_carbon_by_aircraft
+from database import Database, DatabaseError, create_database
+from state_archive import StateArchiveReader
+
+
+class BackfillChunk(NamedTuple):
+    """Time range of an airspace archive processed by a single backfill task.
+
+    Args:
+        archive_dir (str): Root directory of the state vector archive.
+        airspace (str): Name of the airspace.
+        bounding_box (Tuple): Bounding box of the airspace.
+        begin (int): Start of the chunk in seconds since epoch, inclusive.
+        end (int): End of the chunk in seconds since epoch, exclusive.
+        interval (int): Seconds between two sequence points.
+        exit_time_threshold (int): Exit time threshold of the carbon computation.
+    """
+
+    archive_dir: str
+    airspace: str
+    bounding_box: Tuple[float, float, float, float]
+    begin: int
+    end: int
+    interval: int
+    exit_time_threshold: int
+
+
+def split_time_range(begin: int, end: int, chunk_seconds: int) -> List[Tuple[int, int]]:
+    """Splits the time range from begin to end into consecutive chunks.
+
+    Args:
+        begin (int): Start of the time range in seconds since epoch, inclusive.
+        end (int): End of the time range in seconds since epoch, exclusive.
+        chunk_seconds (int): Maximum length of a chunk in seconds.
+
+    Returns:
+        List[Tuple[int, int]]: Start and end of every chunk.
+    """
+    return [
+        (start, min(start + chunk_seconds, end))
+        for start in range(begin, end, chunk_seconds)
+    ]
+
+
+def backfill_chunk(chunk: BackfillChunk) -> Dict[int, float]:
+    """Computes the carbon emission of an airspace within a chunk of its archive.
+
+    A chunk does not start with an empty airspace. Aircrafts seen before the
+    chunk are still tracked, so the cycles preceding it are replayed without
+    counting their emission first. An aircraft is dropped by the first cycle at
+    least exit_time_threshold seconds after its last update, so only aircrafts
+    seen after the last cycle before the chunk minus the threshold can still be
+    tracked when the chunk starts. Replaying from there restores exactly the
+    state of a sequential computation over the whole archive.
+
+    Should be executed in a worker process.
+
+    Args:
+        chunk (BackfillChunk): The chunk to compute.
+
+    Returns:
+        Dict[int, float]: The emission of the chunk per sequence point, i.e. the
+            emission of all cycles after the previous and before the given point.
+    """
+    reader = StateArchiveReader(chunk.archive_dir, chunk.airspace)
+    carbon_computer = StateCarbonComputation(
+        chunk.airspace,
+        chunk.bounding_box,
+        carbon_estimator=get_assumed_carbon_by_aircraft,
+    )
+
+    last_cycle = reader.last_cycle_before(chunk.begin)
+    if last_cycle is not None:
+        warmup_begin = last_cycle - chunk.exit_time_threshold + 1
+        for request_time, states in reader.iter_cycles(warmup_begin, chunk.begin - 1):
+            carbon_computer.get_co2_emission(
+                states, request_time, chunk.exit_time_threshold
+            )
+
+    emissions: Dict[int, float] = {}
+    for request_time, states in reader.iter_cycles(chunk.begin, chunk.end - 1):
+        emission = carbon_computer.get_co2_emission(
+            states, request_time, chunk.exit_time_threshold
+        )
+        point = (request_time // chunk.interval + 1) * chunk.interval
+        emissions[point] = emissions.get(point, 0.0) + emission
+    return emissions
+
+
+def backfill_airspace(
+    archive_dir: str,
+    airspace: str,
+    bounding_box: Tuple[float, float, float, float],
+    begin: int,
+    end: int,
+    interval: int = 3600,
+    chunk_seconds: int = 24 * 3600,
+    processes: Optional[int] = None,
+    exit_time_threshold: int = 300,
+) -> Tuple[Dict[int, float], float]:
+    """Recomputes the carbon sequence of an airspace from its state vector archive.
+
+    The time range is split into chunks, which are computed in parallel worker
+    processes with the assumed fuel consumption rate of the carbon computation.
+
+    Args:
+        archive_dir (str): Root directory of the state vector archive.
+        airspace (str): Name of the airspace.
+        bounding_box (Tuple): Bounding box of the airspace.
+        begin (int): Start of the time range in seconds since epoch.
+        end (int): End of the time range in seconds since epoch.
+        interval (int): Seconds between two sequence points. Defaults to one hour.
+        chunk_seconds (int): Length of the chunks computed by a single task.
+            Defaults to one day.
+        processes (int, optional): Number of worker processes. Defaults to the
+            number of CPUs. With a single process, chunks are computed in the
+            calling process.
+        exit_time_threshold (int): Exit time threshold of the carbon computation.
+
+    Returns:
+        Tuple[Dict[int, float], float]: The total emission since begin at every
+            multiple of interval within the time range and the total emission of
+            the whole time range.
+    """
+    chunks = [
+        BackfillChunk(
+            archive_dir,
+            airspace,
+            bounding_box,
+            chunk_begin,
+            chunk_end,
+            interval,
+            exit_time_threshold,
+        )
+        for chunk_begin, chunk_end in split_time_range(begin, end, chunk_seconds)
+    ]
+
+    emissions: Dict[int, float] = {}
+    for chunk_emissions in _map_chunks(chunks, processes):
+        for point, emission in chunk_emissions.items():
+            emissions[point] = emissions.get(point, 0.0) + emission
+
+    sequence = {}
+    total = 0.0
+    first_point = (begin // interval + 1) * interval
+    for point in range(first_point, end + 1, interval):
+        total += emissions.pop(point, 0.0)
+        sequence[point] = total
+    # cycles after the last sequence point
+    total += sum(emissions.values())
+    return sequence, total
+
+
+def _map_chunks(
+    chunks: List[BackfillChunk], processes: Optional[int]
+) -> Iterator[Dict[int, float]]:
+    """Yields the emissions of all chunks, computed in a process pool if needed."""
+    if processes == 1:
+        yield from map(backfill_chunk, chunks)
+        return
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        yield from executor.map(backfill_chunk, chunks)
+
+
+def store_backfill(db: Database, airspace: str, sequence: Dict[int, float]) -> None:
+    """Stores a backfilled carbon sequence in a single batch write."""
+    db.set_carbon_timestamps(
+        airspace,
+        {datetime.fromtimestamp(point): total for point, total in sequence.items()},
+    )
+
+
+def argparser() -> ArgumentParser:
+    """Returns command line arguments parser."""
+    parser = ArgumentParser()
+
+    parser.add_argument("--archive_dir", type=str, required=True)
+
+    parser.add_argument(
+        "--airspaces",
+        type=str,
+        help="Comma separated airspaces to backfill, defaults to all archived ones",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--begin",
+        type=str,
+        help="Start of the backfill in ISO format, defaults to the first cycle",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--end",
+        type=str,
+        help="End of the backfill in ISO format, defaults to the last cycle",
+        default=None,
+    )
+
+    parser.add_argument("--interval", type=int, help="Seconds per point", default=3600)
+
+    parser.add_argument("--chunk_hours", type=int, default=24)
+
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Number of worker processes, defaults to the number of CPUs",
+        default=None,
+    )
+
+    parser.add_argument("--db_host", type=str, default="127.0.0.1")
+
+    parser.add_argument("--db_port", type=int, default=6379)
+
+    parser.add_argument(
+        "--db_backend", type=str, choices=["redis", "sqlite"], default="redis"
+    )
+
+    parser.add_argument("--db_path", type=str, default="carbon.db")
+
+    return parser
+
+
+def main() -> None:
+    """Backfill the carbon sequences of airspaces from their state vector archive."""
+    args = argparser().parse_args()
+    db = create_database(args.db_backend, args.db_host, args.db_port, args.db_path)
+
+    try:
+        db.is_running()
+    except DatabaseError:
+        raise RuntimeError("Database connection failed.")
+
+    airspaces = db.get_airspaces()
+    if args.airspaces:
+        airspaces = {name: airspaces[name] for name in args.airspaces.split(",")}
+
+    for airspace, bounding_box in airspaces.items():
+        time_range = StateArchiveReader(args.archive_dir, airspace).time_range()
+        if time_range is None:
+            print(f"No archived states of {airspace}", flush=True)
+            continue
+
+        begin = (
+            int(datetime.fromisoformat(args.begin).timestamp())
+            if args.begin
+            else time_range[0]
+        )
+        end = (
+            int(datetime.fromisoformat(args.end).timestamp())
+            if args.end
+            else time_range[1] + 1
+        )
+        sequence, total = backfill_airspace(
+            args.archive_dir,
+            airspace,
+            bounding_box,
+            begin,
+            end,
+            args.interval,
+            args.chunk_hours * 3600,
+            args.processes,
+        )
+        store_backfill(db, airspace, sequence)
+        print(
+            f"Backfilled {len(sequence)} points in {airspace}, total emission: {total}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Benchmarks of the backend, run as modules from the src directory."""
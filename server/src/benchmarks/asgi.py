@@ -0,0 +1,36 @@
+"""Helpers to call ASGI applications in process without HTTP server and client."""
+
+from typing import Any, Dict, List, Tuple
+
+
+async def asgi_get(app: Any, path: str, query: str = "") -> Tuple[int, bytes]:
+    """Sends a GET request to an ASGI application and returns status and body."""
+    status = 0
+    body: List[bytes] = []
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "root_path": "",
+        "query_string": query.encode("utf-8"),
+        "headers": [],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 8000),
+    }
+    await app(scope, receive, send)
+    return status, b"".join(body)
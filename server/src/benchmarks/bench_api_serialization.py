@@ -0,0 +1,80 @@
+"""Compares default and fast json responses of large carbon sequences.
+
+The database returns a prepared sequence, so only routing, validation and
+serialization of the response are measured.
+
+Run from the server/src directory:
+    python -m benchmarks.bench_api_serialization --points 10000 50000 --requests 50
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from argparse import ArgumentParser
+from typing import Dict, List
+
+from benchmarks.asgi import asgi_get
+from database import MemoryDatabase
+
+# the api is deployed on its own and imports its modules from the api directory
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, "api"))
+from server_api import FastAPIWithDatabase  # noqa: E402
+
+
+class PreparedSequenceDatabase(MemoryDatabase):
+    """In-memory database returning a prepared carbon sequence without lookup."""
+
+    def __init__(self, points: int) -> None:
+        super().__init__()
+        self.sequence = {
+            1_600_000_000 + index * 3600: index * 1.5 for index in range(points)
+        }
+
+    def get_carbon_sequence(
+        self, airspace: str, begin: int, end: int
+    ) -> Dict[int, float]:
+        """Returns the prepared carbon sequence."""
+        return self.sequence
+
+
+async def measure(api: FastAPIWithDatabase) -> float:
+    """Returns the latency of requesting the carbon sequence in seconds."""
+    start = time.perf_counter()
+    status, _ = await asgi_get(api.app, "/api/bench/data")
+    assert status == 200
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Requests sequences of different lengths in both modes and prints latencies."""
+    parser = ArgumentParser()
+    parser.add_argument("--points", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    for points in args.points:
+        db = PreparedSequenceDatabase(points)
+        apis = {
+            "default": FastAPIWithDatabase(db),
+            "fast json": FastAPIWithDatabase(db, fast_json=True),
+        }
+        _, body = asyncio.run(asgi_get(apis["fast json"].app, "/api/bench/data"))
+
+        # alternate between the modes to spread background noise evenly
+        latencies: Dict[str, List[float]] = {mode: [] for mode in apis}
+        for _ in range(args.requests):
+            for mode, api in apis.items():
+                latencies[mode].append(asyncio.run(measure(api)))
+
+        print(f"{points} points, {len(body) / 1024:.0f} KiB response")
+        for mode, values in latencies.items():
+            print(
+                f"  {mode:<10} median {statistics.median(values) * 1000:8.2f} ms"
+                f"  max {max(values) * 1000:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
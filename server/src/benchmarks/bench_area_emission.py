@@ -0,0 +1,120 @@
+"""Measures on-demand emission queries of custom areas.
+
+Bursts of concurrent requests for random areas within the airspaces are sent to
+the api. The database is an in-memory database with a state snapshot of every
+airspace, and counts how often the snapshots are loaded.
+
+Run from the server/src directory:
+    python -m benchmarks.bench_area_emission --aircrafts 500 --requests 200 --bursts 5
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from argparse import ArgumentParser
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.asgi import asgi_get
+from database import MemoryDatabase
+
+# the api is deployed on its own and imports its modules from the api directory
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, "api"))
+import server_api  # noqa: E402
+from server_api import FastAPIWithDatabase  # noqa: E402
+
+AIRSPACES = {
+    "berlin": (52.3418234221, 13.0882097323, 52.6697240587, 13.7606105539),
+    "paris": (48.753020, 2.138901, 48.937837, 2.493896),
+    "london": (51.344500, -0.388934, 51.643400, 0.194758),
+    "madrid": (40.312817, -3.831991, 40.561061, -3.524374),
+}
+
+
+class CountingDatabase(MemoryDatabase):
+    """In-memory database counting the loads of the state snapshots."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.snapshot_loads = 0
+
+    def get_state_snapshots(self) -> Dict[str, Tuple[int, Dict[str, Dict[str, Any]]]]:
+        """Returns the state snapshots and counts the call."""
+        self.snapshot_loads += 1
+        return super().get_state_snapshots()
+
+
+def random_area(generator: random.Random) -> str:
+    """Returns the query string of a random area within a random airspace."""
+    lamin, lomin, lamax, lomax = generator.choice(list(AIRSPACES.values()))
+    latitudes = sorted(generator.uniform(lamin, lamax) for _ in range(2))
+    longitudes = sorted(generator.uniform(lomin, lomax) for _ in range(2))
+    return (
+        f"lamin={latitudes[0]}&lomin={longitudes[0]}"
+        f"&lamax={latitudes[1]}&lomax={longitudes[1]}"
+    )
+
+
+async def burst(api: FastAPIWithDatabase, queries: List[str]) -> List[float]:
+    """Sends all queries concurrently and returns their latencies in seconds."""
+
+    async def request(query: str) -> float:
+        start = time.perf_counter()
+        status, _ = await asgi_get(api.app, "/api/area/emission", query)
+        assert status == 200
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(request(query) for query in queries))
+
+
+def main() -> None:
+    """Sends bursts of area queries and prints latencies and database loads."""
+    parser = ArgumentParser()
+    parser.add_argument("--aircrafts", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--bursts", type=int, default=5)
+    args = parser.parse_args()
+
+    generator = random.Random(0)
+    db = CountingDatabase()
+    db.set_airspaces(AIRSPACES)
+    for airspace, (lamin, lomin, lamax, lomax) in AIRSPACES.items():
+        db.set_state_snapshot(
+            airspace,
+            1_688_515_200,
+            {
+                f"{airspace[:2]}{index:04x}": {
+                    "last_update": 1_688_515_200,
+                    "position": (
+                        generator.uniform(lamin, lamax),
+                        generator.uniform(lomin, lomax),
+                    ),
+                    "on_ground": generator.random() < 0.1,
+                    "velocity": generator.uniform(50, 250),
+                    "true_track": generator.uniform(0, 360),
+                }
+                for index in range(args.aircrafts)
+            },
+        )
+
+    # every burst is answered from freshly loaded snapshots
+    server_api.SNAPSHOT_CACHE_SECONDS = 0
+    api = FastAPIWithDatabase(db)
+    queries = [random_area(generator) for _ in range(args.requests)]
+    latencies: List[float] = []
+    for _ in range(args.bursts):
+        latencies.extend(asyncio.run(burst(api, queries)))
+
+    print(
+        f"{args.bursts} bursts of {args.requests} concurrent area queries, "
+        f"{args.aircrafts} aircrafts per airspace"
+    )
+    print(f"  snapshot loads     {db.snapshot_loads:>8}")
+    print(f"  median latency     {statistics.median(latencies) * 1000:>8.2f} ms")
+    print(f"  maximum latency    {max(latencies) * 1000:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
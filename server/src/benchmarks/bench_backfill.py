@@ -0,0 +1,90 @@
+"""Measures the backfill of a synthetic state vector archive.
+
+Run from the server/src directory:
+    python -m benchmarks.bench_backfill --days 7 --aircrafts 150 --cycle 10
+
+The archive is written to a temporary directory with one cycle every --cycle
+seconds and about --aircrafts aircrafts in the airspace at any time. It is
+backfilled sequentially and with a process per CPU.
+"""
+
+import os
+import random
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from backfill import backfill_airspace
+from state_archive import StateArchiveWriter
+
+# Bounding box of the berlin airspace
+BOUNDING_BOX = (52.3418234221, 13.0882097323, 52.6697240587, 13.7606105539)
+
+BEGIN = 1_688_515_200
+
+# Seconds an aircraft needs to cross the airspace
+CROSSING_SECONDS = 20 * 60
+
+
+def write_archive(directory: str, days: int, aircrafts: int, cycle: int) -> int:
+    """Writes a synthetic archive and returns the number of archived cycles."""
+    lamin, lomin, lamax, lomax = BOUNDING_BOX
+    generator = random.Random(0)
+    writer = StateArchiveWriter(directory, "bench")
+    departure_interval = CROSSING_SECONDS / aircrafts
+
+    cycles = 0
+    next_departure = float(BEGIN)
+    flights: dict = {}
+    for request_time in range(BEGIN, BEGIN + days * 24 * 3600, cycle):
+        while next_departure <= request_time:
+            icao24 = f"{generator.randrange(16**6):06x}"
+            flights[icao24] = (next_departure, generator.uniform(lamin, lamax))
+            next_departure += departure_interval
+
+        states = {}
+        for icao24, (departure, latitude) in list(flights.items()):
+            progress = (request_time - departure) / CROSSING_SECONDS
+            if progress >= 1:
+                del flights[icao24]
+                continue
+            states[icao24] = {
+                "last_update": request_time,
+                "position": (latitude, lomin + progress * (lomax - lomin)),
+                "on_ground": False,
+                "velocity": 230.0,
+                "true_track": 90.0,
+            }
+        writer.append(request_time, states)
+        cycles += 1
+    return cycles
+
+
+def main() -> None:
+    """Backfills a synthetic archive sequentially and in parallel."""
+    parser = ArgumentParser()
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--aircrafts", type=int, default=150)
+    parser.add_argument("--cycle", type=int, default=10)
+    args = parser.parse_args()
+    end = BEGIN + args.days * 24 * 3600
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        cycles = write_archive(directory, args.days, args.aircrafts, args.cycle)
+        print(f"Archived {cycles} cycles in {time.perf_counter() - start:.1f} s")
+
+        for processes in [1, os.cpu_count() or 1]:
+            start = time.perf_counter()
+            sequence, total = backfill_airspace(
+                directory, "bench", BOUNDING_BOX, BEGIN, end, processes=processes
+            )
+            seconds = time.perf_counter() - start
+            print(
+                f"{processes:>3} processes: {seconds:>7.2f} s, "
+                f"{cycles / seconds:>9.0f} cycles/s, total {total:.0f} kg"
+            )
+
+
+if __name__ == "__main__":
+    main()
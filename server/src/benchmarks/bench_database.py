@@ -0,0 +1,114 @@
+"""Compares speed and storage cost of the database backends.
+
+Run from the server/src directory:
+    python -m benchmarks.bench_database --points 100000 --aircrafts 500 --cycles 120
+
+The redis backend is only measured with --redis and a running redis server. Its
+data is written to the keys of a random airspace name and deleted afterwards.
+"""
+
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from uuid import uuid4
+
+from database import Database, MemoryDatabase, RedisDatabase, SQLiteDatabase
+
+
+def timed(func: Callable[[], object]) -> float:
+    """Returns the wall clock time of calling func in seconds."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run_workload(
+    db: Database, airspace: str, points: int, aircrafts: int, cycles: int
+) -> Dict[str, float]:
+    """Runs the benchmark workload on db and returns the timings in seconds."""
+    icao24s = [f"{index:06x}" for index in range(aircrafts)]
+    start = 1_600_000_000
+
+    def write_sequence() -> None:
+        for index in range(points):
+            db.set_carbon_timestamp(
+                airspace, datetime.fromtimestamp(start + index * 60), float(index)
+            )
+
+    def write_ledger() -> None:
+        for cycle in range(cycles):
+            emissions = {icao24: random.random() * 100 for icao24 in icao24s}
+            db.add_aircraft_emissions(
+                airspace, datetime.fromtimestamp(start + cycle * 60), emissions
+            )
+
+    end = start + max(points, cycles) * 60
+    return {
+        "sequence writes": timed(write_sequence),
+        "ledger writes": timed(write_ledger),
+        "sequence read": timed(lambda: db.get_carbon_sequence(airspace, 0, points)),
+        "top 10 aircrafts": timed(
+            lambda: db.get_top_aircraft_emissions(airspace, start, end, 10)
+        ),
+        "aircraft history": timed(
+            lambda: db.get_aircraft_emission_history(airspace, icao24s[0], start, end)
+        ),
+    }
+
+
+def main() -> None:
+    """Runs the workload on every backend and prints timings and storage cost."""
+    parser = ArgumentParser()
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--aircrafts", type=int, default=500)
+    parser.add_argument("--cycles", type=int, default=120)
+    parser.add_argument("--redis", action="store_true")
+    parser.add_argument("--db_host", type=str, default="127.0.0.1")
+    parser.add_argument("--db_port", type=int, default=6379)
+    args = parser.parse_args()
+    workload = (args.points, args.aircrafts, args.cycles)
+
+    results: List[Tuple[str, Dict[str, float], int]] = []
+
+    tracemalloc.start()
+    memory_db = MemoryDatabase()
+    timings = run_workload(memory_db, "bench", *workload)
+    results.append(("memory", timings, tracemalloc.get_traced_memory()[0]))
+    tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        sqlite_db = SQLiteDatabase(path)
+        timings = run_workload(sqlite_db, "bench", *workload)
+        sqlite_db.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        results.append(("sqlite", timings, os.path.getsize(path)))
+        sqlite_db.connection.close()
+
+    if args.redis:
+        redis_db = RedisDatabase(args.db_host, args.db_port)
+        redis_db.is_running()
+        airspace = f"bench-{uuid4().hex}"
+        used_memory = redis_db.redis.info("memory")["used_memory"]
+        timings = run_workload(redis_db, airspace, *workload)
+        storage = redis_db.redis.info("memory")["used_memory"] - used_memory
+        results.append(("redis", timings, storage))
+        keys = list(redis_db.redis.scan_iter(f"*{airspace}*"))
+        redis_db.redis.delete(*keys)
+
+    print(
+        f"{args.points} sequence points, {args.cycles} cycles "
+        f"with {args.aircrafts} aircrafts"
+    )
+    for backend, timings, storage in results:
+        print(f"\n{backend} - storage {storage / 1024 / 1024:.1f} MiB")
+        for name, seconds in timings.items():
+            print(f"  {name:<20}{seconds * 1000:>12.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compares speed and accuracy of the geodesy module with geopy.
+
+Run from the server/src directory:
+    python -m benchmarks.bench_geodesy --pairs 100000
+"""
+
+import random
+import time
+from argparse import ArgumentParser
+from typing import Callable, Dict, List, Tuple
+
+from geopy import distance as geopy_distance  # type: ignore
+
+from geodesy import LocalProjection, haversine_km, haversine_km_batch, km_to_nautical
+
+# Bounding box of the berlin airspace
+BOUNDING_BOX = (52.3418234221, 13.0882097323, 52.6697240587, 13.7606105539)
+
+Positions = List[Tuple[float, float]]
+
+
+def random_pairs(count: int) -> Tuple[Positions, Positions]:
+    """Returns pairs of random positions within the bounding box."""
+    lamin, lomin, lamax, lomax = BOUNDING_BOX
+    generator = random.Random(0)
+    positions = [
+        (generator.uniform(lamin, lamax), generator.uniform(lomin, lomax))
+        for _ in range(2 * count)
+    ]
+    return positions[:count], positions[count:]
+
+
+def main() -> None:
+    """Measures every distance function on the same pairs of positions."""
+    parser = ArgumentParser()
+    parser.add_argument("--pairs", type=int, default=100_000)
+    args = parser.parse_args()
+
+    positions1, positions2 = random_pairs(args.pairs)
+    pairs = list(zip(positions1, positions2))
+    projection = LocalProjection(BOUNDING_BOX)
+
+    functions: Dict[str, Callable[[], List[float]]] = {
+        "geopy great_circle": lambda: [
+            geopy_distance.great_circle(p1, p2).km for p1, p2 in pairs
+        ],
+        "geopy geodesic": lambda: [
+            geopy_distance.distance(p1, p2).km for p1, p2 in pairs
+        ],
+        "haversine": lambda: [haversine_km(*p1, *p2) for p1, p2 in pairs],
+        "haversine batch": lambda: haversine_km_batch(positions1, positions2),
+        "planar": lambda: [projection.distance_km(p1, p2) for p1, p2 in pairs],
+        "planar batch": lambda: projection.distance_km_batch(positions1, positions2),
+    }
+
+    results = {}
+    print(f"{args.pairs} distances within the berlin airspace")
+    for name, function in functions.items():
+        start = time.perf_counter()
+        results[name] = function()
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<20}{elapsed / args.pairs * 1e9:>10.0f} ns per distance")
+
+    reference = results["geopy great_circle"]
+    print("\nmaximum relative error against geopy great_circle")
+    for name, distances in results.items():
+        error = max(
+            abs(distance - expected) / expected
+            for distance, expected in zip(distances, reference)
+            if expected > 0
+        )
+        print(f"  {name:<20}{error:>10.2e}")
+    print(f"  {'planar error bound':<20}{projection.max_relative_error:>10.2e}")
+
+    start = time.perf_counter()
+    [geopy_distance.Distance(kilometers=distance).nautical for distance in reference]
+    geopy_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    [km_to_nautical(distance) for distance in reference]
+    elapsed = time.perf_counter() - start
+    print(
+        f"\nconversion to nautical miles: geopy {geopy_elapsed / args.pairs * 1e9:.0f} "
+        f"ns, km_to_nautical {elapsed / args.pairs * 1e9:.0f} ns"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Measures the startup time of the server processes.
+
+Every entry point is imported in a fresh interpreter, as on a cold start of its
+container. The median wall time and the heavy dependencies loaded by the import
+are printed, so regressions of the lazy imports show up in both.
+
+Run from the server/src directory:
+    python -m benchmarks.bench_startup --runs 10
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from typing import List, Tuple
+
+# Dependencies which are imported on first use
+HEAVY_MODULES = ["redis", "requests", "schedule", "uvicorn", "geopy"]
+
+SOURCE_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir)
+
+# Name and code of every entry point, the api imports its modules from the api directory
+ENTRY_POINTS = [
+    ("interpreter", "pass"),
+    ("main", "import main"),
+    ("server_api", "sys.path.append('api'); import server_api"),
+    ("emission_stream", "import emission_stream"),
+    ("backfill", "import backfill"),
+]
+
+
+def measure(code: str) -> Tuple[float, List[str]]:
+    """Runs code in a fresh interpreter and returns its wall time and heavy imports."""
+    script = (
+        f"import sys; {code}; import json; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=SOURCE_DIRECTORY,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return time.perf_counter() - start, json.loads(output.splitlines()[-1])
+
+
+def main() -> None:
+    """Imports every entry point repeatedly and prints the median startup times."""
+    parser = ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"Median of {args.runs} cold imports")
+    for name, code in ENTRY_POINTS:
+        times = []
+        for _ in range(args.runs):
+            seconds, heavy_modules = measure(code)
+            times.append(seconds)
+        print(
+            f"  {name:<16} {statistics.median(times) * 1000:>8.1f} ms  "
+            f"heavy imports: {', '.join(heavy_modules) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
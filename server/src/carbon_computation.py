@@ -1,7 +1,11 @@
 import math
-from typing import Tuple, Dict, Any
-from geopy import distance as geopy_distance  # type: ignore
+from typing import Callable, List, Sequence, Tuple, Dict, Any, Optional
+from aircraft_registry import AircraftRegistry
 from flight_fuel_consumption_api import get_flight_fuel_consumption
+from geodesy import LocalProjection, haversine_km, haversine_km_batch, km_to_nautical
+
+# Maximum relative error of distances to use the planar approximation in an airspace
+PLANAR_DISTANCE_TOLERANCE = 1e-3
 
 
 def get_carbon_by_distance(icao24_distance: Dict[str, float]) -> float:
@@ -14,33 +18,63 @@ def get_carbon_by_distance(icao24_distance: Dict[str, float]) -> float:
     Returns:
         float: Total carbon emission in kilograms.
     """
-    new_co2_emission = 0.0
+    return sum(get_carbon_by_aircraft(icao24_distance).values())
+
+
+def get_carbon_by_aircraft(icao24_distance: Dict[str, float]) -> Dict[str, float]:
+    """Returns the carbon emission of every aircraft from its flight distance.
+
+    Args:
+        icao24_distance (Dict[str, float]): Dictionary of icao24 codes with their
+            respective distance travelled.
+
+    Returns:
+        Dict[str, float]: Dictionary of icao24 codes with their carbon emission
+            in kilograms.
+    """
+    aircraft_emissions = {}
 
     flight_fuels = get_flight_fuel_consumption(icao24_distance)
     if flight_fuels:
-        # list of co2 emissions of aircrafts with known fuel consumption
-        co2_list = [flight["co2"] for flight in flight_fuels if flight.get("co2")]
+        for flight in flight_fuels:
+            icao24 = flight["icao24"]
+            if icao24 not in icao24_distance:
+                continue
+            if flight.get("co2") is not None:
+                # co2 emission of aircraft with known fuel consumption
+                aircraft_emissions[icao24] = flight["co2"]
+
+    missing = {
+        icao24: distance
+        for icao24, distance in icao24_distance.items()
+        if icao24 not in aircraft_emissions
+    }
+    if missing and not flight_fuels:
+        print("Using assumed fuel consumption rate for all aircrafts")
+    # calculate co2 emission of aircrafts with unknown fuel consumption rate and of
+    # aircrafts missing from the response, e.g. of a failed chunk
+    aircraft_emissions.update(get_assumed_carbon_by_aircraft(missing))
 
-        # list of icao24 codes with unknown fuel consumption
-        no_co2_icao24_list = [
-            flight["icao24"] for flight in flight_fuels if flight.get("co2") is None
-        ]
+    return aircraft_emissions
 
-        # calculate co2 emission with unknown fuel consumption rate
-        assumed_co2_list = [
-            _get_co2_emission_by_consumption_rate(icao24_distance[icao24])
-            for icao24 in no_co2_icao24_list
-        ]
-        new_co2_emission += sum(co2_list) + sum(assumed_co2_list)
-    else:
-        print("Using assumed fuel consumption rate for all aircrafts")
-        assumed_co2_list = [
-            _get_co2_emission_by_consumption_rate(distance)
-            for icao24, distance in icao24_distance.items()
-        ]
-        new_co2_emission += sum(assumed_co2_list)
 
-    return new_co2_emission
+def get_assumed_carbon_by_aircraft(icao24_distance: Dict[str, float]) -> Dict[str, float]:
+    """Returns the carbon emission of every aircraft with assumed fuel consumption.
+
+    Does not query the Flight Fuel Consumption API, e.g. for offline recomputations.
+
+    Args:
+        icao24_distance (Dict[str, float]): Dictionary of icao24 codes with their
+            respective distance travelled.
+
+    Returns:
+        Dict[str, float]: Dictionary of icao24 codes with their carbon emission
+            in kilograms.
+    """
+    return {
+        icao24: _get_co2_emission_by_consumption_rate(distance)
+        for icao24, distance in icao24_distance.items()
+    }
 
 
 def _get_co2_emission_by_consumption_rate(
@@ -70,17 +104,41 @@ class StateCarbonComputation:
             bounding box = (lamin, lomin, lamax, lomax)
                 lamin = south border, lamax = north border
                 lomin = west border, lomax = east border
+        carbon_estimator (Callable): Function returning the carbon emission per
+            aircraft from their distances. Defaults to get_carbon_by_aircraft.
+        registry (AircraftRegistry, optional): Registry of aircraft states shared
+            with other airspaces. A private registry is used if None.
     """
 
     def __init__(
-        self, airspace_name: str, bounding_box: Tuple[float, float, float, float]
+        self,
+        airspace_name: str,
+        bounding_box: Tuple[float, float, float, float],
+        carbon_estimator: Callable[
+            [Dict[str, float]], Dict[str, float]
+        ] = get_carbon_by_aircraft,
+        registry: Optional[AircraftRegistry] = None,
     ) -> None:
         self.airspace_name: str = airspace_name
+        self.carbon_estimator = carbon_estimator
         self.bounding_box: Tuple[float, float, float, float] = bounding_box
         self.aircrafts_in_airspace: Dict = {}
-        self.bounding_box_diagonal: float = geopy_distance.distance(
-            (bounding_box[0], bounding_box[1]), (bounding_box[2], bounding_box[3])
-        ).km
+        self.aircraft_emissions: Dict[str, float] = {}
+        # running total of the airspace, if it is not read from the database
+        self.total_emission: Optional[float] = None
+        self.last_request_time: Optional[int] = None
+        self.bounding_box_diagonal: float = haversine_km(*bounding_box)
+
+        # Use the planar approximation of distances, if it is accurate enough
+        projection = LocalProjection(bounding_box)
+        self.get_distances_km: Callable[
+            [Sequence[Tuple[float, float]], Sequence[Tuple[float, float]]], List[float]
+        ] = (
+            projection.distance_km_batch
+            if projection.max_relative_error <= PLANAR_DISTANCE_TOLERANCE
+            else haversine_km_batch
+        )
+        self.registry = registry or AircraftRegistry(self.get_distances_km)
 
     def get_co2_emission(
         self,
@@ -90,18 +148,22 @@ class StateCarbonComputation:
     ) -> float:
         """Returns new carbon emission given new airspace state information.
 
-        1. Keep track of the aircraft state from current and previous requests
-            and store it in the aircrafts_in_airspace instance variable.
+        1. Register the current states in the aircraft registry and keep track of
+            the aircraft state from current and previous requests in the
+            aircrafts_in_airspace instance variable.
         2. Calculate the distance between the aircraft's previous position and
-            its current position, if its previous state is known.
+            its current position, if its previous state is known. The registry
+            computes the distance of an aircraft only once for all airspaces.
         3. Determine which aircrafts are no longer in the airspace. If said aircraft's
             latest position is on ground, then no further calculations are needed.
             Otherwise, calculate the distance from the latest recorded position to
             the edge of the bounding box.
-        4. Create a dict of {icao24 : distance} and compute carbon emission.
+        4. Create a dict of {icao24 : distance} and compute carbon emission. The
+            emission per aircraft is kept in the aircraft_emissions instance variable.
         5. Remove aircrafts that are no longer in the airspace.
-        6. Remove curr_distance attribute because it should not carry over
-            to the next request-response cycle.
+
+        States are shared with other airspaces through the registry and are never
+        modified.
 
         Args:
             current_aircrafts (Dict[str, Dict[str, Any]]): A dictionary of the current
@@ -120,21 +182,36 @@ class StateCarbonComputation:
         Returns:
             float: The new carbon emission that was calculated.
         """
-        for aircraft_id, state in current_aircrafts.items():
-            if self.aircrafts_in_airspace.get(aircraft_id) is not None:
-                old_state = self.aircrafts_in_airspace[aircraft_id]
-                old_pos = old_state["position"]
-                new_pos = state["position"]
-
-                # calculate distance between previous and current position
-                distance = geopy_distance.great_circle(old_pos, new_pos).km
-                new_state = {attr: state[attr] for attr in state}
-                if distance > 0:
-                    new_state["curr_distance"] = distance
-
-                self.aircrafts_in_airspace[aircraft_id] = new_state
-            else:
-                self.aircrafts_in_airspace[aircraft_id] = state
+        self.last_request_time = request_time
+        current_aircrafts = self.registry.ingest(
+            current_aircrafts, request_time - exit_time_threshold
+        )
+
+        # calculate distance between previous and current position in one batch
+        known_aircraft_ids = [
+            aircraft_id
+            for aircraft_id in current_aircrafts
+            if aircraft_id in self.aircrafts_in_airspace
+        ]
+        distances: Dict[str, float] = {
+            aircraft_id: distance
+            for aircraft_id, distance in zip(
+                known_aircraft_ids,
+                self.registry.get_segment_distances(
+                    known_aircraft_ids,
+                    [
+                        self.aircrafts_in_airspace[aircraft_id]
+                        for aircraft_id in known_aircraft_ids
+                    ],
+                    [
+                        current_aircrafts[aircraft_id]
+                        for aircraft_id in known_aircraft_ids
+                    ],
+                ),
+            )
+            if distance > 0
+        }
+        self.aircrafts_in_airspace.update(current_aircrafts)
 
         # find out which aircrafts are no longer in the airspace
         aircraft_id_not_in_airspace = []
@@ -159,10 +236,7 @@ class StateCarbonComputation:
                 state["position"],
             )
             # calculate the distance that the aircraft was in the airspace
-            distance = geopy_distance.great_circle(
-                state["position"],
-                (edge_position[0], edge_position[1]),
-            ).km
+            distance = self.get_distances_km([state["position"]], [edge_position])[0]
 
             if distance >= self.bounding_box_diagonal:
                 print(
@@ -174,29 +248,25 @@ class StateCarbonComputation:
                 )
 
             if distance > 0:
-                self.aircrafts_in_airspace[aircraft_id]["curr_distance"] = distance
+                distances[aircraft_id] = distance
 
-        # create icao24_distance_list
+        # create icao24_distance_list in the order of the aircrafts in the airspace
         icao24_distance = {
-            icao24: geopy_distance.Distance(kilometers=state["curr_distance"]).nautical
-            for icao24, state in self.aircrafts_in_airspace.items()
-            if state.get("curr_distance")
+            icao24: km_to_nautical(distances[icao24])
+            for icao24 in self.aircrafts_in_airspace
+            if icao24 in distances
         }
 
-        # get total carbon emission
-        new_co2_emission = 0.0
+        # get carbon emission per aircraft and in total
+        self.aircraft_emissions = {}
         if icao24_distance:
-            new_co2_emission = get_carbon_by_distance(icao24_distance)
+            self.aircraft_emissions = self.carbon_estimator(icao24_distance)
+        new_co2_emission = sum(self.aircraft_emissions.values())
 
         # remove aircrafts no longer in airspace
         for aircraft_id in aircraft_id_not_in_airspace:
             del self.aircrafts_in_airspace[aircraft_id]
 
-        # remove curr_distance for aircrafts in airspace
-        for icao24, state in self.aircrafts_in_airspace.items():
-            if state.get("curr_distance"):
-                del state["curr_distance"]
-
         return new_co2_emission
 
     def get_edge_position(
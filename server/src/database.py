@@ -1,8 +1,102 @@
-from redis import Redis
-
+import heapq
+import json
+import sqlite3
+import time
 from abc import ABC, abstractmethod
-from typing import Tuple, Dict
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, deque
+from threading import Condition, Lock
+from typing import Any, Deque, Tuple, Dict, List, Optional, Union
 from datetime import datetime
+from uuid import uuid4
+
+# Size of the time buckets of the per-aircraft emission ledger in seconds
+LEDGER_BUCKET_SECONDS = 3600
+
+
+# Name and approximate maximum length of the emission event stream
+EMISSION_STREAM = "emissions"
+EMISSION_STREAM_MAXLEN = 100_000
+
+
+def get_ledger_bucket(timestamp: int) -> int:
+    """Returns the start of the ledger time bucket containing timestamp."""
+    return timestamp - timestamp % LEDGER_BUCKET_SECONDS
+
+
+def _encode_emission_event(
+    airspace: str,
+    timestamp: datetime,
+    emission: float,
+    total: float,
+    aircraft_emissions: Dict[str, float],
+) -> Dict[str, Any]:
+    """Returns an emission event in the form stored in the event stream."""
+    return {
+        "airspace": airspace,
+        "time": int(timestamp.timestamp()),
+        "emission": emission,
+        "total": total,
+        "aircraft_emissions": json.dumps(aircraft_emissions),
+    }
+
+
+def _decode_emission_event(fields: Dict) -> Dict[str, Any]:
+    """Returns an emission event from its stored form with str or bytes values."""
+    fields = {
+        (key.decode("utf-8") if isinstance(key, bytes) else key): (
+            value.decode("utf-8") if isinstance(value, bytes) else value
+        )
+        for key, value in fields.items()
+    }
+    return {
+        "airspace": fields["airspace"],
+        "time": int(fields["time"]),
+        "emission": float(fields["emission"]),
+        "total": float(fields["total"]),
+        "aircraft_emissions": json.loads(fields["aircraft_emissions"]),
+    }
+
+
+def _encode_state_snapshot(request_time: int, states: Dict[str, Dict[str, Any]]) -> str:
+    """Returns transformed state vectors of an airspace as compact JSON."""
+    return json.dumps(
+        {
+            "time": request_time,
+            "states": [
+                [
+                    icao24,
+                    state["last_update"],
+                    state["position"][0],
+                    state["position"][1],
+                    state["on_ground"],
+                    state["velocity"],
+                    state["true_track"],
+                ]
+                for icao24, state in states.items()
+            ],
+        },
+        separators=(",", ":"),
+    )
+
+
+def _decode_state_snapshot(
+    data: Union[str, bytes],
+) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+    """Returns request time and transformed state vectors from compact JSON."""
+    snapshot = json.loads(data)
+    return snapshot["time"], {
+        icao24: {
+            "last_update": last_update,
+            "position": (latitude, longitude),
+            "on_ground": on_ground,
+            "velocity": velocity,
+            "true_track": true_track,
+        }
+        for icao24, last_update, latitude, longitude, on_ground, velocity, true_track in (
+            snapshot["states"]
+        )
+    }
 
 
 class DatabaseError(Exception):
@@ -79,6 +173,163 @@ class Database(ABC):
         """Stores the carbon emission value in an airspace at specific timestamp."""
         pass
 
+    @abstractmethod
+    def set_carbon_timestamps(self, airspace: str, values: Dict[datetime, float]) -> None:
+        """Stores carbon emission values in an airspace at many timestamps at once."""
+        pass
+
+    @abstractmethod
+    def get_latest_carbon_sequence(
+        self, airspace: str, count: Optional[int] = None
+    ) -> Dict[int, float]:
+        """Get the latest count carbon values in airspace, all if count is None."""
+        pass
+
+    def get_airspace_summaries(
+        self, airspaces: Optional[List[str]] = None, count: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Returns bounding box, total and latest carbon values of airspaces.
+
+        Args:
+            airspaces (List[str], optional): Names of the airspaces. Defaults to all
+                stored airspaces, unknown names are skipped.
+            count (int, optional): Number of latest carbon values per airspace.
+                Defaults to all values.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Dictionary of airspace names with their
+                summary in the form {"bounding_box": Tuple, "total": float,
+                "data": Dict[int, float]}.
+        """
+        bounding_boxes = self.get_airspaces()
+        return {
+            airspace: {
+                "bounding_box": bounding_boxes[airspace],
+                "total": self.get_total_carbon(airspace),
+                "data": self.get_latest_carbon_sequence(airspace, count),
+            }
+            for airspace in (airspaces or bounding_boxes)
+            if airspace in bounding_boxes
+        }
+
+    @abstractmethod
+    def add_aircraft_emissions(
+        self, airspace: str, timestamp: datetime, emissions: Dict[str, float]
+    ) -> None:
+        """Adds emission values of aircrafts to the ledger of airspace at timestamp.
+
+        Args:
+            airspace (str): Name of the airspace.
+            timestamp (datetime): Time of the emission, determines the time bucket.
+            emissions (Dict[str, float]): Dictionary of icao24 codes with their
+                emission.
+        """
+        pass
+
+    @abstractmethod
+    def get_top_aircraft_emissions(
+        self, airspace: str, begin: int, end: int, count: int
+    ) -> List[Tuple[str, float]]:
+        """Returns the count aircrafts with highest emission between begin and end.
+
+        The list is sorted in descending order of emission. All time buckets
+        overlapping the range between begin and end are included.
+        """
+        pass
+
+    @abstractmethod
+    def get_aircraft_emission_history(
+        self, airspace: str, icao24: str, begin: int, end: int
+    ) -> Dict[int, float]:
+        """Returns the emission of an aircraft per time bucket between begin and end."""
+        pass
+
+    @abstractmethod
+    def append_emission_event(
+        self,
+        airspace: str,
+        timestamp: datetime,
+        emission: float,
+        total: float,
+        aircraft_emissions: Dict[str, float],
+    ) -> None:
+        """Appends the emission of a computation cycle to the emission event stream.
+
+        Args:
+            airspace (str): Name of the airspace.
+            timestamp (datetime): Time of the computation cycle.
+            emission (float): New carbon emission in the airspace.
+            total (float): Total carbon emission in the airspace after the cycle.
+            aircraft_emissions (Dict[str, float]): Dictionary of icao24 codes with
+                their new emission.
+        """
+        pass
+
+    @abstractmethod
+    def create_emission_consumer_group(self, group: str) -> None:
+        """Creates a consumer group reading the event stream from its beginning.
+
+        Nothing happens if the group already exists.
+        """
+        pass
+
+    @abstractmethod
+    def read_emission_events(
+        self,
+        group: str,
+        consumer: str,
+        count: int = 100,
+        block: Optional[int] = None,
+        pending: bool = False,
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Reads emission events of the stream as a consumer of a consumer group.
+
+        Every event is delivered to only one consumer of the group and stays
+        pending until it is acknowledged.
+
+        Args:
+            group (str): Name of the consumer group.
+            consumer (str): Name of the consumer within the group.
+            count (int): Maximum number of events to read.
+            block (int, optional): Milliseconds to wait for new events, if there
+                are none. Does not wait if None.
+            pending (bool): Read the unacknowledged events delivered to the consumer
+                before instead of new events.
+
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: List of event ids with their event in
+                the form {"airspace": str, "time": int, "emission": float,
+                "total": float, "aircraft_emissions": Dict[str, float]}.
+        """
+        pass
+
+    @abstractmethod
+    def ack_emission_events(self, group: str, event_ids: List[str]) -> None:
+        """Acknowledges the processing of events by a consumer group."""
+        pass
+
+    @abstractmethod
+    def set_state_snapshot(
+        self, airspace: str, request_time: int, states: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Replaces the latest transformed state vectors of an airspace."""
+        pass
+
+    @abstractmethod
+    def get_state_snapshots(self) -> Dict[str, Tuple[int, Dict[str, Dict[str, Any]]]]:
+        """Returns request time and latest state vectors of all airspaces."""
+        pass
+
+    @abstractmethod
+    def get_setting(self, name: str) -> Optional[str]:
+        """Returns the value of a runtime setting, None if it is not set."""
+        pass
+
+    @abstractmethod
+    def set_setting(self, name: str, value: Optional[str]) -> None:
+        """Sets the value of a runtime setting, removes it if value is None."""
+        pass
+
     @abstractmethod
     def get_celeb_emissions(self) -> Dict[str, float]:
         """Returns dictionary of celebs with their emission."""
@@ -95,6 +346,9 @@ class RedisDatabase(Database):
 
     def __init__(self, host: str, port: int) -> None:
         super().__init__(host, port)
+        # imported on first use, so the other backends start without the redis client
+        from redis import Redis
+
         self.redis = Redis(host=host, port=port, db=0)
 
     def is_running(self) -> None:
@@ -157,6 +411,209 @@ class RedisDatabase(Database):
         """Stores the carbon emission value in an airspace at specific timestamp."""
         self.redis.zadd(airspace, {str(dt.timestamp()): value})
 
+    def set_carbon_timestamps(self, airspace: str, values: Dict[datetime, float]) -> None:
+        """Stores carbon emission values in an airspace at many timestamps at once."""
+        if values:
+            self.redis.zadd(
+                airspace, {str(dt.timestamp()): value for dt, value in values.items()}
+            )
+
+    def get_latest_carbon_sequence(
+        self, airspace: str, count: Optional[int] = None
+    ) -> Dict[int, float]:
+        """Get the latest count carbon values in airspace, all if count is None."""
+        data = self.redis.zrevrange(airspace, 0, (count or 0) - 1, withscores=True)
+        return self._decode_carbon_sequence(data)
+
+    @staticmethod
+    def _decode_carbon_sequence(data: List[Tuple[bytes, float]]) -> Dict[int, float]:
+        """Returns a carbon sequence in ascending order from sorted set entries."""
+        return {
+            int(float(timestamp.decode())): float(value)
+            for timestamp, value in sorted(data, key=lambda entry: entry[1])
+        }
+
+    def get_airspace_summaries(
+        self, airspaces: Optional[List[str]] = None, count: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Returns bounding box, total and latest carbon values of airspaces.
+
+        Needs two round trips to redis independent of the number of airspaces.
+        """
+        bounding_boxes = self.get_airspaces()
+        names = [
+            airspace
+            for airspace in (airspaces or bounding_boxes)
+            if airspace in bounding_boxes
+        ]
+        if not names:
+            return {}
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hmget("total", names)
+        for airspace in names:
+            pipe.zrevrange(airspace, 0, (count or 0) - 1, withscores=True)
+        totals, *sequences = pipe.execute()
+
+        return {
+            airspace: {
+                "bounding_box": bounding_boxes[airspace],
+                "total": float(total.decode()) if total else 0.0,
+                "data": self._decode_carbon_sequence(data),
+            }
+            for airspace, total, data in zip(names, totals, sequences)
+        }
+
+    def add_aircraft_emissions(
+        self, airspace: str, timestamp: datetime, emissions: Dict[str, float]
+    ) -> None:
+        """Adds emission values of aircrafts to the ledger of airspace at timestamp.
+
+        Every time bucket is a sorted set of icao24 codes scored by their emission.
+        The start times of all buckets of an airspace are indexed in another sorted
+        set. All writes are sent in a single pipelined round trip.
+        """
+        if not emissions:
+            return
+        bucket = get_ledger_bucket(int(timestamp.timestamp()))
+        bucket_key = f"ledger:{airspace}:{bucket}"
+
+        pipe = self.redis.pipeline(transaction=False)
+        for icao24, value in emissions.items():
+            pipe.zincrby(bucket_key, value, icao24)
+        pipe.zadd(f"ledger:{airspace}", {str(bucket): bucket})
+        pipe.execute()
+
+    def get_top_aircraft_emissions(
+        self, airspace: str, begin: int, end: int, count: int
+    ) -> List[Tuple[str, float]]:
+        """Returns the count aircrafts with highest emission between begin and end."""
+        bucket_keys = self._get_ledger_bucket_keys(airspace, begin, end)
+        if not bucket_keys:
+            return []
+
+        if len(bucket_keys) == 1:
+            data = self.redis.zrevrange(bucket_keys[0], 0, count - 1, withscores=True)
+        else:
+            # aggregate buckets on the server and only transfer the top entries
+            tmp_key = f"ledger:tmp:{uuid4().hex}"
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zunionstore(tmp_key, bucket_keys)
+            pipe.zrevrange(tmp_key, 0, count - 1, withscores=True)
+            pipe.delete(tmp_key)
+            data = pipe.execute()[1]
+
+        return [(icao24.decode("utf-8"), float(value)) for icao24, value in data]
+
+    def get_aircraft_emission_history(
+        self, airspace: str, icao24: str, begin: int, end: int
+    ) -> Dict[int, float]:
+        """Returns the emission of an aircraft per time bucket between begin and end."""
+        bucket_keys = self._get_ledger_bucket_keys(airspace, begin, end)
+
+        pipe = self.redis.pipeline(transaction=False)
+        for bucket_key in bucket_keys:
+            pipe.zscore(bucket_key, icao24)
+        values = pipe.execute() if bucket_keys else []
+
+        return {
+            int(bucket_key.rsplit(":", 1)[1]): float(value)
+            for bucket_key, value in zip(bucket_keys, values)
+            if value is not None
+        }
+
+    def _get_ledger_bucket_keys(self, airspace: str, begin: int, end: int) -> List[str]:
+        """Returns the keys of existing ledger buckets between begin and end."""
+        buckets = self.redis.zrangebyscore(
+            f"ledger:{airspace}", get_ledger_bucket(begin), end
+        )
+        return [f"ledger:{airspace}:{bucket.decode()}" for bucket in buckets]
+
+    def append_emission_event(
+        self,
+        airspace: str,
+        timestamp: datetime,
+        emission: float,
+        total: float,
+        aircraft_emissions: Dict[str, float],
+    ) -> None:
+        """Appends the emission of a computation cycle to a capped redis stream."""
+        self.redis.xadd(
+            EMISSION_STREAM,
+            _encode_emission_event(
+                airspace, timestamp, emission, total, aircraft_emissions
+            ),
+            maxlen=EMISSION_STREAM_MAXLEN,
+            approximate=True,
+        )
+
+    def create_emission_consumer_group(self, group: str) -> None:
+        """Creates a consumer group reading the event stream from its beginning."""
+        from redis import ResponseError
+
+        try:
+            self.redis.xgroup_create(EMISSION_STREAM, group, id="0", mkstream=True)
+        except ResponseError as error:
+            if "BUSYGROUP" not in str(error):
+                raise
+
+    def read_emission_events(
+        self,
+        group: str,
+        consumer: str,
+        count: int = 100,
+        block: Optional[int] = None,
+        pending: bool = False,
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Reads emission events of the stream as a consumer of a consumer group."""
+        response = self.redis.xreadgroup(
+            group,
+            consumer,
+            {EMISSION_STREAM: "0" if pending else ">"},
+            count=count,
+            block=None if pending else block,
+        )
+        if not response:
+            return []
+        # entries of trimmed events have no fields
+        return [
+            (event_id.decode("utf-8"), _decode_emission_event(fields))
+            for event_id, fields in response[0][1]
+            if fields
+        ]
+
+    def ack_emission_events(self, group: str, event_ids: List[str]) -> None:
+        """Acknowledges the processing of events by a consumer group."""
+        if event_ids:
+            self.redis.xack(EMISSION_STREAM, group, *event_ids)
+
+    def set_state_snapshot(
+        self, airspace: str, request_time: int, states: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Replaces the latest transformed state vectors of an airspace."""
+        self.redis.hset(
+            "state_snapshots", airspace, _encode_state_snapshot(request_time, states)
+        )
+
+    def get_state_snapshots(self) -> Dict[str, Tuple[int, Dict[str, Dict[str, Any]]]]:
+        """Returns request time and latest state vectors of all airspaces."""
+        return {
+            airspace.decode("utf-8"): _decode_state_snapshot(data)
+            for airspace, data in self.redis.hgetall("state_snapshots").items()
+        }
+
+    def get_setting(self, name: str) -> Optional[str]:
+        """Returns the value of a runtime setting from redis, None if it is not set."""
+        value = self.redis.hget("settings", name)
+        return value.decode("utf-8") if value is not None else None
+
+    def set_setting(self, name: str, value: Optional[str]) -> None:
+        """Sets the value of a runtime setting, removes it if value is None."""
+        if value is None:
+            self.redis.hdel("settings", name)
+        else:
+            self.redis.hset("settings", name, value)
+
     def get_celeb_emissions(self) -> Dict[str, float]:
         """Returns dictionary of celebs with their emission."""
         celeb_data = self.redis.hgetall("celeb")
@@ -173,3 +630,650 @@ class RedisDatabase(Database):
             for key, value in celeb_emissions.items()
         }
         self.redis.hmset("celeb", encoded_emissions)  # type: ignore
+
+
+class _SortedSet:
+    """In-memory counterpart of a redis sorted set ordered by (score, member)."""
+
+    def __init__(self) -> None:
+        self.scores: Dict[str, float] = {}
+        self.entries: List[Tuple[float, str]] = []
+
+    def add(self, member: str, score: float) -> None:
+        """Adds member with score or updates the score of an existing member."""
+        old_score = self.scores.get(member)
+        if old_score is not None:
+            del self.entries[bisect_left(self.entries, (old_score, member))]
+        self.scores[member] = score
+        insort(self.entries, (score, member))
+
+    def incr(self, member: str, amount: float) -> None:
+        """Increments the score of member by amount."""
+        self.add(member, self.scores.get(member, 0.0) + amount)
+
+    def range_by_score(
+        self, min_score: float, max_score: float
+    ) -> List[Tuple[str, float]]:
+        """Returns members with scores between min_score and max_score, ascending."""
+        low = bisect_left(self.entries, min_score, key=lambda entry: entry[0])
+        high = bisect_right(self.entries, max_score, key=lambda entry: entry[0])
+        return [(member, score) for score, member in self.entries[low:high]]
+
+    def top(self, count: int) -> List[Tuple[str, float]]:
+        """Returns the count members with the highest scores, descending."""
+        return [(member, score) for score, member in reversed(self.entries[-count:])]
+
+
+class MemoryDatabase(Database):
+    """Implementation of database functions within the running process.
+
+    Data is lost when the process ends. The stored data structures mirror the
+    layout of RedisDatabase, so both backends return the same results.
+    """
+
+    def __init__(self) -> None:
+        super().__init__("memory", 0)
+        self.lock = Lock()
+        self.startup_time = 0
+        self.airspaces: Dict[str, Tuple] = {}
+        self.total: Dict[str, float] = {}
+        self.sequences: Dict[str, _SortedSet] = defaultdict(_SortedSet)
+        self.ledger: Dict[str, Dict[int, _SortedSet]] = defaultdict(dict)
+        self.ledger_buckets: Dict[str, List[int]] = defaultdict(list)
+        self.celeb_emissions: Dict[str, float] = {}
+        self.state_snapshots: Dict[str, Tuple[int, Dict[str, Dict[str, Any]]]] = {}
+        self.settings: Dict[str, str] = {}
+        self.stream: Deque[Tuple[int, Dict[str, Any]]] = deque(
+            maxlen=EMISSION_STREAM_MAXLEN
+        )
+        self.stream_sequence = 0
+        self.stream_condition = Condition(self.lock)
+        self.consumer_groups: Dict[str, Dict[str, Any]] = {}
+
+    def is_running(self) -> None:
+        """The in-memory database is always running."""
+        pass
+
+    def get_server_startup_time(self) -> int:
+        """Returns startup time of the server as POSIX timestamp."""
+        return self.startup_time
+
+    def set_server_startup_time(self, startup_time: datetime) -> None:
+        """Sets startup time of the server as POSIX timestamp."""
+        self.startup_time = int(startup_time.timestamp())
+
+    def get_airspaces(self) -> Dict[str, Tuple]:
+        """Returns Dictionary of airspaces in the form name: bounding_box."""
+        with self.lock:
+            return dict(self.airspaces)
+
+    def set_airspaces(
+        self, airspaces: Dict[str, Tuple[float, float, float, float]]
+    ) -> None:
+        """Saves airspace-dictionary in the form name: bounding_box."""
+        with self.lock:
+            self.airspaces.update(
+                {name: tuple(map(float, box)) for name, box in airspaces.items()}
+            )
+
+    def get_total_carbon(self, airspace: str) -> float:
+        """Returns total carbon emission value in airspace."""
+        return self.total.get(airspace, 0.0)
+
+    def set_total_carbon(self, airspace: str, value: float) -> None:
+        """Sets total carbon emission value in airspace."""
+        self.total[airspace] = float(value)
+
+    def get_carbon_sequence(
+        self, airspace: str, begin: int, end: int
+    ) -> Dict[int, float]:
+        """Get sequence of carbon values in airspace between begin and end."""
+        with self.lock:
+            if airspace not in self.sequences:
+                return {}
+            data = self.sequences[airspace].range_by_score(begin, end)
+        return {int(float(timestamp)): value for timestamp, value in data}
+
+    def set_carbon_timestamp(self, airspace: str, dt: datetime, value: float) -> None:
+        """Stores the carbon emission value in an airspace at specific timestamp."""
+        with self.lock:
+            self.sequences[airspace].add(str(dt.timestamp()), float(value))
+
+    def set_carbon_timestamps(self, airspace: str, values: Dict[datetime, float]) -> None:
+        """Stores carbon emission values in an airspace at many timestamps at once."""
+        with self.lock:
+            for dt, value in values.items():
+                self.sequences[airspace].add(str(dt.timestamp()), float(value))
+
+    def get_latest_carbon_sequence(
+        self, airspace: str, count: Optional[int] = None
+    ) -> Dict[int, float]:
+        """Get the latest count carbon values in airspace, all if count is None."""
+        with self.lock:
+            if airspace not in self.sequences:
+                return {}
+            entries = self.sequences[airspace].entries
+            data = entries[-count:] if count else list(entries)
+        return {int(float(timestamp)): value for value, timestamp in data}
+
+    def add_aircraft_emissions(
+        self, airspace: str, timestamp: datetime, emissions: Dict[str, float]
+    ) -> None:
+        """Adds emission values of aircrafts to the ledger of airspace at timestamp."""
+        if not emissions:
+            return
+        bucket = get_ledger_bucket(int(timestamp.timestamp()))
+
+        with self.lock:
+            if bucket not in self.ledger[airspace]:
+                self.ledger[airspace][bucket] = _SortedSet()
+                insort(self.ledger_buckets[airspace], bucket)
+            bucket_set = self.ledger[airspace][bucket]
+            for icao24, value in emissions.items():
+                bucket_set.incr(icao24, value)
+
+    def get_top_aircraft_emissions(
+        self, airspace: str, begin: int, end: int, count: int
+    ) -> List[Tuple[str, float]]:
+        """Returns the count aircrafts with highest emission between begin and end."""
+        with self.lock:
+            buckets = self._get_ledger_buckets(airspace, begin, end)
+            if len(buckets) == 1:
+                return buckets[0].top(count)
+
+            aggregated: Dict[str, float] = defaultdict(float)
+            for bucket_set in buckets:
+                for icao24, value in bucket_set.scores.items():
+                    aggregated[icao24] += value
+        return heapq.nlargest(
+            count, aggregated.items(), key=lambda entry: (entry[1], entry[0])
+        )
+
+    def get_aircraft_emission_history(
+        self, airspace: str, icao24: str, begin: int, end: int
+    ) -> Dict[int, float]:
+        """Returns the emission of an aircraft per time bucket between begin and end."""
+        with self.lock:
+            ledger = self.ledger.get(airspace, {})
+            buckets = self.ledger_buckets.get(airspace, [])
+            low = bisect_left(buckets, get_ledger_bucket(begin))
+            high = bisect_right(buckets, end)
+            return {
+                bucket: ledger[bucket].scores[icao24]
+                for bucket in buckets[low:high]
+                if icao24 in ledger[bucket].scores
+            }
+
+    def _get_ledger_buckets(
+        self, airspace: str, begin: int, end: int
+    ) -> List[_SortedSet]:
+        """Returns the existing ledger buckets between begin and end."""
+        ledger = self.ledger.get(airspace, {})
+        buckets = self.ledger_buckets.get(airspace, [])
+        low = bisect_left(buckets, get_ledger_bucket(begin))
+        high = bisect_right(buckets, end)
+        return [ledger[bucket] for bucket in buckets[low:high]]
+
+    def append_emission_event(
+        self,
+        airspace: str,
+        timestamp: datetime,
+        emission: float,
+        total: float,
+        aircraft_emissions: Dict[str, float],
+    ) -> None:
+        """Appends the emission of a computation cycle to the capped event stream."""
+        event = _decode_emission_event(
+            _encode_emission_event(
+                airspace, timestamp, emission, total, aircraft_emissions
+            )
+        )
+        with self.stream_condition:
+            self.stream_sequence += 1
+            self.stream.append((self.stream_sequence, event))
+            self.stream_condition.notify_all()
+
+    def create_emission_consumer_group(self, group: str) -> None:
+        """Creates a consumer group reading the event stream from its beginning."""
+        with self.lock:
+            self.consumer_groups.setdefault(group, {"last": 0, "pending": {}})
+
+    def read_emission_events(
+        self,
+        group: str,
+        consumer: str,
+        count: int = 100,
+        block: Optional[int] = None,
+        pending: bool = False,
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Reads emission events of the stream as a consumer of a consumer group."""
+        with self.stream_condition:
+            consumer_group = self.consumer_groups[group]
+            if pending:
+                pending_events = [
+                    (str(number), event)
+                    for number, event in self.stream
+                    if consumer_group["pending"].get(number) == consumer
+                ]
+                return pending_events[:count]
+
+            if block is not None and self.stream_sequence <= consumer_group["last"]:
+                self.stream_condition.wait(block / 1000)
+
+            events: List[Tuple[str, Dict[str, Any]]] = []
+            for number, event in self.stream:
+                if len(events) == count:
+                    break
+                if number > consumer_group["last"]:
+                    consumer_group["last"] = number
+                    consumer_group["pending"][number] = consumer
+                    events.append((str(number), event))
+            return events
+
+    def ack_emission_events(self, group: str, event_ids: List[str]) -> None:
+        """Acknowledges the processing of events by a consumer group."""
+        with self.lock:
+            for event_id in event_ids:
+                self.consumer_groups[group]["pending"].pop(int(event_id), None)
+
+    def set_state_snapshot(
+        self, airspace: str, request_time: int, states: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Replaces the latest transformed state vectors of an airspace."""
+        with self.lock:
+            self.state_snapshots[airspace] = (request_time, dict(states))
+
+    def get_state_snapshots(self) -> Dict[str, Tuple[int, Dict[str, Dict[str, Any]]]]:
+        """Returns request time and latest state vectors of all airspaces."""
+        with self.lock:
+            return dict(self.state_snapshots)
+
+    def get_setting(self, name: str) -> Optional[str]:
+        """Returns the value of a runtime setting, None if it is not set."""
+        with self.lock:
+            return self.settings.get(name)
+
+    def set_setting(self, name: str, value: Optional[str]) -> None:
+        """Sets the value of a runtime setting, removes it if value is None."""
+        with self.lock:
+            if value is None:
+                self.settings.pop(name, None)
+            else:
+                self.settings[name] = value
+
+    def get_celeb_emissions(self) -> Dict[str, float]:
+        """Returns dictionary of celebs with their emission."""
+        with self.lock:
+            return dict(self.celeb_emissions)
+
+    def set_celeb_emissions(self, celeb_emissions: Dict[str, float]) -> None:
+        """Stores carbon emission value of celebrities."""
+        with self.lock:
+            self.celeb_emissions.update(
+                {celeb: float(value) for celeb, value in celeb_emissions.items()}
+            )
+
+
+class SQLiteDatabase(Database):
+    """Implementation of database functions with an embedded SQLite database file.
+
+    The database runs in write-ahead-logging mode, so the API can read while the
+    computation writes. Tables mirror the data layout of RedisDatabase.
+
+    Args:
+        path (str): Path to the database file. ":memory:" keeps it in memory.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, 0)
+        self.path = path
+        self.lock = Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS settings (
+                name TEXT PRIMARY KEY, value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS airspaces (
+                name TEXT PRIMARY KEY, bounding_box TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS total (
+                airspace TEXT PRIMARY KEY, value REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sequence (
+                airspace TEXT NOT NULL,
+                member TEXT NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (airspace, member)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS sequence_score ON sequence (airspace, score);
+            CREATE TABLE IF NOT EXISTS ledger (
+                airspace TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                icao24 TEXT NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (airspace, bucket, icao24)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS ledger_icao24 ON ledger (airspace, icao24, bucket);
+            CREATE TABLE IF NOT EXISTS celeb (
+                name TEXT PRIMARY KEY, value REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS state_snapshots (
+                airspace TEXT PRIMARY KEY, snapshot TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS emission_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                airspace TEXT NOT NULL,
+                time INTEGER NOT NULL,
+                emission REAL NOT NULL,
+                total REAL NOT NULL,
+                aircraft_emissions TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS consumer_groups (
+                name TEXT PRIMARY KEY, last_id INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pending_events (
+                group_name TEXT NOT NULL,
+                event_id INTEGER NOT NULL,
+                consumer TEXT NOT NULL,
+                PRIMARY KEY (group_name, event_id)
+            ) WITHOUT ROWID;
+            """)
+
+    def _execute(self, sql: str, parameters: Tuple = ()) -> List[Tuple]:
+        """Executes a single statement in its own transaction and returns all rows."""
+        with self.lock, self.connection:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def _execute_many(self, sql: str, parameters: List[Tuple]) -> None:
+        """Executes a statement for a batch of parameters in a single transaction."""
+        with self.lock, self.connection:
+            self.connection.executemany(sql, parameters)
+
+    def is_running(self) -> None:
+        """Check whether the database file can be queried.
+
+        Raises:
+            DatabaseError, if the database file is not accessible.
+        """
+        try:
+            self._execute("SELECT 1")
+        except sqlite3.Error:
+            raise DatabaseError(f"SQLite Database {self.path} not accessible.")
+
+    def get_server_startup_time(self) -> int:
+        """Returns startup time of the server as POSIX timestamp."""
+        rows = self._execute("SELECT value FROM settings WHERE name = 'startup_time'")
+        return int(rows[0][0]) if rows else 0
+
+    def set_server_startup_time(self, startup_time: datetime) -> None:
+        """Sets startup time of the server as POSIX timestamp."""
+        self._execute(
+            "INSERT OR REPLACE INTO settings VALUES ('startup_time', ?)",
+            (str(int(startup_time.timestamp())),),
+        )
+
+    def get_airspaces(self) -> Dict[str, Tuple]:
+        """Returns Dictionary of airspaces in the form name: bounding_box."""
+        rows = self._execute("SELECT name, bounding_box FROM airspaces")
+        return {name: tuple(map(float, box.split(","))) for name, box in rows}
+
+    def set_airspaces(
+        self, airspaces: Dict[str, Tuple[float, float, float, float]]
+    ) -> None:
+        """Saves airspace-dictionary in the form name: bounding_box."""
+        self._execute_many(
+            "INSERT OR REPLACE INTO airspaces VALUES (?, ?)",
+            [
+                (name, ",".join(str(coord) for coord in bounding_box))
+                for name, bounding_box in airspaces.items()
+            ],
+        )
+
+    def get_total_carbon(self, airspace: str) -> float:
+        """Returns total carbon emission value in airspace."""
+        rows = self._execute("SELECT value FROM total WHERE airspace = ?", (airspace,))
+        return float(rows[0][0]) if rows else 0.0
+
+    def set_total_carbon(self, airspace: str, value: float) -> None:
+        """Sets total carbon emission value in airspace."""
+        self._execute("INSERT OR REPLACE INTO total VALUES (?, ?)", (airspace, value))
+
+    def get_carbon_sequence(
+        self, airspace: str, begin: int, end: int
+    ) -> Dict[int, float]:
+        """Get sequence of carbon values in airspace between begin and end."""
+        rows = self._execute(
+            "SELECT member, score FROM sequence "
+            "WHERE airspace = ? AND score BETWEEN ? AND ? ORDER BY score, member",
+            (airspace, begin, end),
+        )
+        return {int(float(timestamp)): value for timestamp, value in rows}
+
+    def set_carbon_timestamp(self, airspace: str, dt: datetime, value: float) -> None:
+        """Stores the carbon emission value in an airspace at specific timestamp."""
+        self._execute(
+            "INSERT OR REPLACE INTO sequence VALUES (?, ?, ?)",
+            (airspace, str(dt.timestamp()), value),
+        )
+
+    def set_carbon_timestamps(self, airspace: str, values: Dict[datetime, float]) -> None:
+        """Stores carbon emission values in an airspace at many timestamps at once.
+
+        All values are written in a single batched transaction.
+        """
+        self._execute_many(
+            "INSERT OR REPLACE INTO sequence VALUES (?, ?, ?)",
+            [(airspace, str(dt.timestamp()), value) for dt, value in values.items()],
+        )
+
+    def get_latest_carbon_sequence(
+        self, airspace: str, count: Optional[int] = None
+    ) -> Dict[int, float]:
+        """Get the latest count carbon values in airspace, all if count is None."""
+        rows = self._execute(
+            "SELECT member, score FROM sequence WHERE airspace = ? "
+            "ORDER BY score DESC, member DESC LIMIT ?",
+            (airspace, count or -1),
+        )
+        return {int(float(timestamp)): value for timestamp, value in reversed(rows)}
+
+    def add_aircraft_emissions(
+        self, airspace: str, timestamp: datetime, emissions: Dict[str, float]
+    ) -> None:
+        """Adds emission values of aircrafts to the ledger of airspace at timestamp.
+
+        All aircrafts are written in a single batched transaction.
+        """
+        if not emissions:
+            return
+        bucket = get_ledger_bucket(int(timestamp.timestamp()))
+        self._execute_many(
+            "INSERT INTO ledger VALUES (?, ?, ?, ?) ON CONFLICT DO UPDATE "
+            "SET value = value + excluded.value",
+            [(airspace, bucket, icao24, value) for icao24, value in emissions.items()],
+        )
+
+    def get_top_aircraft_emissions(
+        self, airspace: str, begin: int, end: int, count: int
+    ) -> List[Tuple[str, float]]:
+        """Returns the count aircrafts with highest emission between begin and end."""
+        rows = self._execute(
+            "SELECT icao24, SUM(value) AS emission FROM ledger "
+            "WHERE airspace = ? AND bucket BETWEEN ? AND ? "
+            "GROUP BY icao24 ORDER BY emission DESC, icao24 DESC LIMIT ?",
+            (airspace, get_ledger_bucket(begin), end, count),
+        )
+        return [(icao24, float(value)) for icao24, value in rows]
+
+    def get_aircraft_emission_history(
+        self, airspace: str, icao24: str, begin: int, end: int
+    ) -> Dict[int, float]:
+        """Returns the emission of an aircraft per time bucket between begin and end."""
+        rows = self._execute(
+            "SELECT bucket, value FROM ledger "
+            "WHERE airspace = ? AND icao24 = ? AND bucket BETWEEN ? AND ? "
+            "ORDER BY bucket",
+            (airspace, icao24, get_ledger_bucket(begin), end),
+        )
+        return {bucket: float(value) for bucket, value in rows}
+
+    def append_emission_event(
+        self,
+        airspace: str,
+        timestamp: datetime,
+        emission: float,
+        total: float,
+        aircraft_emissions: Dict[str, float],
+    ) -> None:
+        """Appends the emission of a computation cycle to the capped event table."""
+        event = _encode_emission_event(
+            airspace, timestamp, emission, total, aircraft_emissions
+        )
+        with self.lock, self.connection:
+            event_id = self.connection.execute(
+                "INSERT INTO emission_events "
+                "(airspace, time, emission, total, aircraft_emissions) "
+                "VALUES (:airspace, :time, :emission, :total, :aircraft_emissions)",
+                event,
+            ).lastrowid
+            self.connection.execute(
+                "DELETE FROM emission_events WHERE id <= ?",
+                ((event_id or 0) - EMISSION_STREAM_MAXLEN,),
+            )
+
+    def create_emission_consumer_group(self, group: str) -> None:
+        """Creates a consumer group reading the event stream from its beginning."""
+        self._execute("INSERT OR IGNORE INTO consumer_groups VALUES (?, 0)", (group,))
+
+    def read_emission_events(
+        self,
+        group: str,
+        consumer: str,
+        count: int = 100,
+        block: Optional[int] = None,
+        pending: bool = False,
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Reads emission events of the stream as a consumer of a consumer group.
+
+        Blocking reads poll the event table, as other processes may append events.
+        """
+        columns = "e.id, e.airspace, e.time, e.emission, e.total, e.aircraft_emissions"
+        if pending:
+            rows = self._execute(
+                f"SELECT {columns} FROM emission_events e JOIN pending_events p "
+                "ON p.event_id = e.id WHERE p.group_name = ? AND p.consumer = ? "
+                "ORDER BY e.id LIMIT ?",
+                (group, consumer, count),
+            )
+            return [self._row_to_emission_event(row) for row in rows]
+
+        deadline = time.monotonic() + (block or 0) / 1000
+        while True:
+            with self.lock, self.connection:
+                rows = self.connection.execute(
+                    f"SELECT {columns} FROM emission_events e WHERE e.id > "
+                    "(SELECT last_id FROM consumer_groups WHERE name = ?) "
+                    "ORDER BY e.id LIMIT ?",
+                    (group, count),
+                ).fetchall()
+                if rows:
+                    self.connection.execute(
+                        "UPDATE consumer_groups SET last_id = ? WHERE name = ?",
+                        (rows[-1][0], group),
+                    )
+                    self.connection.executemany(
+                        "INSERT OR REPLACE INTO pending_events VALUES (?, ?, ?)",
+                        [(group, row[0], consumer) for row in rows],
+                    )
+            if rows or block is None or time.monotonic() >= deadline:
+                return [self._row_to_emission_event(row) for row in rows]
+            time.sleep(0.1)
+
+    @staticmethod
+    def _row_to_emission_event(row: Tuple) -> Tuple[str, Dict[str, Any]]:
+        """Returns the event id and event of a row of the event table."""
+        event_id, airspace, timestamp, emission, total, aircraft_emissions = row
+        return str(event_id), _decode_emission_event(
+            {
+                "airspace": airspace,
+                "time": timestamp,
+                "emission": emission,
+                "total": total,
+                "aircraft_emissions": aircraft_emissions,
+            }
+        )
+
+    def ack_emission_events(self, group: str, event_ids: List[str]) -> None:
+        """Acknowledges the processing of events by a consumer group."""
+        self._execute_many(
+            "DELETE FROM pending_events WHERE group_name = ? AND event_id = ?",
+            [(group, int(event_id)) for event_id in event_ids],
+        )
+
+    def set_state_snapshot(
+        self, airspace: str, request_time: int, states: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Replaces the latest transformed state vectors of an airspace."""
+        self._execute(
+            "INSERT OR REPLACE INTO state_snapshots VALUES (?, ?)",
+            (airspace, _encode_state_snapshot(request_time, states)),
+        )
+
+    def get_state_snapshots(self) -> Dict[str, Tuple[int, Dict[str, Dict[str, Any]]]]:
+        """Returns request time and latest state vectors of all airspaces."""
+        return {
+            airspace: _decode_state_snapshot(snapshot)
+            for airspace, snapshot in self._execute(
+                "SELECT airspace, snapshot FROM state_snapshots"
+            )
+        }
+
+    def get_setting(self, name: str) -> Optional[str]:
+        """Returns the value of a runtime setting, None if it is not set."""
+        rows = self._execute("SELECT value FROM settings WHERE name = ?", (name,))
+        return rows[0][0] if rows else None
+
+    def set_setting(self, name: str, value: Optional[str]) -> None:
+        """Sets the value of a runtime setting, removes it if value is None."""
+        if value is None:
+            self._execute("DELETE FROM settings WHERE name = ?", (name,))
+        else:
+            self._execute("INSERT OR REPLACE INTO settings VALUES (?, ?)", (name, value))
+
+    def get_celeb_emissions(self) -> Dict[str, float]:
+        """Returns dictionary of celebs with their emission."""
+        return dict(self._execute("SELECT name, value FROM celeb"))
+
+    def set_celeb_emissions(self, celeb_emissions: Dict[str, float]) -> None:
+        """Stores carbon emission value of celebrities."""
+        self._execute_many(
+            "INSERT OR REPLACE INTO celeb VALUES (?, ?)", list(celeb_emissions.items())
+        )
+
+
+def create_database(
+    backend: str, host: str = "127.0.0.1", port: int = 6379, path: Optional[str] = None
+) -> Database:
+    """Creates a database of the given backend.
+
+    Args:
+        backend (str): One of "redis", "sqlite" or "memory".
+        host (str): Host of the redis database.
+        port (int): Port of the redis database.
+        path (str, optional): Path of the SQLite database file.
+
+    Returns:
+        Database: The created database.
+
+    Raises:
+        DatabaseError, if the backend is unknown.
+    """
+    if backend == "redis":
+        return RedisDatabase(host, port)
+    if backend == "sqlite":
+        return SQLiteDatabase(path or "carbon.db")
+    if backend == "memory":
+        return MemoryDatabase()
+    raise DatabaseError(f"Unknown database backend {backend}.")
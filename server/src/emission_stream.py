@@ -0,0 +1,173 @@
+from abc import ABC, abstractmethod
+from argparse import ArgumentParser
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from database import Database, DatabaseError, create_database
+
+
+class EmissionConsumer(ABC):
+    """Abstract class for consumers of the emission event stream.
+
+    Every consumer class reads the stream within its own consumer group, so each
+    consumer class sees every event independently of the others. Multiple
+    instances of a class with different names share the events of their group.
+
+    Args:
+        db (Database): Database providing the event stream.
+        group (str): Name of the consumer group.
+        name (str): Name of the consumer within the group. Default: "main".
+    """
+
+    def __init__(self, db: Database, group: str, name: str = "main") -> None:
+        self.db = db
+        self.group = group
+        self.name = name
+        self.recovered = False
+        self.db.create_emission_consumer_group(group)
+
+    @abstractmethod
+    def handle_event(self, event: Dict[str, Any]) -> None:
+        """Processes a single emission event."""
+        pass
+
+    def consume(self, count: int = 100, block: Optional[int] = None) -> int:
+        """Processes and acknowledges the next events of the stream.
+
+        On the first call, events delivered to this consumer before a restart but
+        never acknowledged are processed first.
+
+        Args:
+            count (int): Maximum number of events to process.
+            block (int, optional): Milliseconds to wait for new events.
+
+        Returns:
+            int: The number of processed events.
+        """
+        events = []
+        if not self.recovered:
+            events = self.db.read_emission_events(
+                self.group, self.name, count, pending=True
+            )
+            self.recovered = len(events) < count
+        if not events:
+            events = self.db.read_emission_events(self.group, self.name, count, block)
+
+        for _, event in events:
+            self.handle_event(event)
+        self.db.ack_emission_events(self.group, [event_id for event_id, _ in events])
+        return len(events)
+
+
+class TotalEmissionConsumer(EmissionConsumer):
+    """Consumer storing the total emission and the aircraft ledger of airspaces."""
+
+    def __init__(self, db: Database, name: str = "main") -> None:
+        super().__init__(db, "totals", name)
+
+    def handle_event(self, event: Dict[str, Any]) -> None:
+        """Stores the total emission of the event and books its aircraft emissions."""
+        self.db.set_total_carbon(event["airspace"], event["total"])
+        self.db.add_aircraft_emissions(
+            event["airspace"],
+            datetime.fromtimestamp(event["time"]),
+            event["aircraft_emissions"],
+        )
+
+
+class HourlySnapshotConsumer(EmissionConsumer):
+    """Consumer storing the total emission of airspaces once every hour.
+
+    The total of the first event of every new hour is stored as sequence point.
+    """
+
+    def __init__(self, db: Database, name: str = "main") -> None:
+        super().__init__(db, "snapshots", name)
+        self.last_hour: Dict[str, int] = {}
+
+    def handle_event(self, event: Dict[str, Any]) -> None:
+        """Stores the total emission of the event, if it starts a new hour."""
+        hour = event["time"] // 3600
+        last_hour = self.last_hour.get(event["airspace"])
+        self.last_hour[event["airspace"]] = hour
+
+        if last_hour is not None and hour > last_hour:
+            self.db.set_carbon_timestamp(
+                event["airspace"], datetime.fromtimestamp(event["time"]), event["total"]
+            )
+            print(
+                f"Stored total emission in {event['airspace']}: {event['total']}",
+                flush=True,
+            )
+
+
+CONSUMERS: Dict[str, Callable[[Database, str], EmissionConsumer]] = {
+    "totals": TotalEmissionConsumer,
+    "snapshots": HourlySnapshotConsumer,
+}
+
+
+def consume_emission_events_job(consumers: List[EmissionConsumer]) -> None:
+    """Lets every consumer process all events available in the stream.
+
+    Should be executed as a job by the schedule library.
+
+    Args:
+        consumers (List[EmissionConsumer]): Consumers of the emission event stream.
+    """
+    for consumer in consumers:
+        while consumer.consume():
+            pass
+
+
+def argparser() -> ArgumentParser:
+    """Returns command line arguments parser."""
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--consumers",
+        type=str,
+        help=f"Comma separated consumers to run, out of {', '.join(CONSUMERS)}",
+        default=",".join(CONSUMERS),
+    )
+
+    parser.add_argument(
+        "--name",
+        type=str,
+        help="Consumer name, has to be unique within the running instances",
+        default="main",
+    )
+
+    parser.add_argument("--db_host", type=str, default="127.0.0.1")
+
+    parser.add_argument("--db_port", type=int, default=6379)
+
+    parser.add_argument(
+        "--db_backend", type=str, choices=["redis", "sqlite"], default="redis"
+    )
+
+    parser.add_argument("--db_path", type=str, default="carbon.db")
+
+    return parser
+
+
+def main() -> None:
+    """Run consumers of the emission event stream independent of the poller."""
+    args = argparser().parse_args()
+    db = create_database(args.db_backend, args.db_host, args.db_port, args.db_path)
+
+    try:
+        db.is_running()
+    except DatabaseError:
+        raise RuntimeError("Database connection failed.")
+
+    consumers = [
+        CONSUMERS[consumer](db, args.name) for consumer in args.consumers.split(",")
+    ]
+    while True:
+        for consumer in consumers:
+            consumer.consume(block=1000)
+
+
+if __name__ == "__main__":
+    main()
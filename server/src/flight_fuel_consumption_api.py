@@ -1,20 +1,243 @@
-import requests
-from typing import Optional, Dict
+import time
+from collections import deque
+from concurrent.futures import Future, wait
+from functools import lru_cache
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Any, Deque, List, Optional, Dict
 
+if TYPE_CHECKING:
+    import requests
 
-def get_flight_fuel_consumption(icao24_distance: Dict[str, float]) -> Optional[Dict]:
+FUEL_API_URL = "https://despouy.ca/flight-fuel-api/q/"
+
+# Seconds a caller waits for the Flight Fuel Consumption API before falling back
+FUEL_API_BUDGET_SECONDS = 3.0
+
+# Maximum length of a request URL, longer URLs are rejected by many servers
+MAX_URL_LENGTH = 2000
+
+# Maximum number of concurrent requests to the API
+MAX_CONCURRENT_REQUESTS = 4
+
+
+class CircuitBreaker:
+    """Circuit breaker failing fast while an external service is unhealthy.
+
+    The breaker is closed while the failure rate of the recent calls is below
+    the threshold. Then it opens and rejects all calls for open_seconds. After
+    that a single probe call is let through in the half-open state, which closes
+    the breaker again on success and reopens it on failure.
+
+    All methods are thread safe.
+
+    Args:
+        window (int): Number of recent calls of the failure rate. Default: 20.
+        failure_rate (float): Failure rate opening the breaker. Default: 0.5.
+        min_calls (int): Minimum number of recent calls to open the breaker.
+            Default: 5.
+        open_seconds (float): Seconds the breaker stays open. Default: 60.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        failure_rate: float = 0.5,
+        min_calls: int = 5,
+        open_seconds: float = 60.0,
+    ) -> None:
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.lock = Lock()
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+
+    def allow_request(self) -> bool:
+        """Returns whether a call may be made now, counts rejected calls."""
+        with self.lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = "half_open"
+                self.probing = False
+
+            if self.state == "half_open":
+                if self.probing:
+                    self.rejected += 1
+                    return False
+                self.probing = True
+            return True
+
+    def record(self, success: bool) -> None:
+        """Records the outcome of an allowed call."""
+        with self.lock:
+            if self.state == "half_open":
+                self.probing = False
+                if success:
+                    self.state = "closed"
+                    self.outcomes.clear()
+                else:
+                    self._open()
+                return
+
+            self.outcomes.append(success)
+            failures = self.outcomes.count(False)
+            if (
+                len(self.outcomes) >= self.min_calls
+                and failures / len(self.outcomes) >= self.failure_rate
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        """Opens the breaker, expects the lock to be held."""
+        print("Flight Fuel Consumption API unhealthy, using assumed consumption")
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.outcomes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns state, recent failures and rejected calls of the breaker."""
+        with self.lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self.outcomes),
+                "recent_failures": self.outcomes.count(False),
+                "rejected": self.rejected,
+            }
+
+
+# Breaker shared by all callers of the Flight Fuel Consumption API
+FUEL_API_BREAKER = CircuitBreaker()
+
+
+@lru_cache(maxsize=None)
+def _get_session() -> "requests.Session":
+    """Returns the session reusing connections to the API, created on first use.
+
+    Requests wait for a free connection of the session.
+    """
+    # imported on first use, requests is the slowest import of the computation
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount(
+        "https://", HTTPAdapter(pool_maxsize=MAX_CONCURRENT_REQUESTS, pool_block=True)
+    )
+    return session
+
+
+def split_into_chunks(
+    icao24_distance: Dict[str, float], max_url_length: int = MAX_URL_LENGTH
+) -> List[Dict[str, float]]:
+    """Splits flights into chunks whose request URLs do not exceed max_url_length.
+
+    Every chunk contains at least one flight, even if its URL is too long.
+
+    Args:
+        icao24_distance (Dict[str, float]): Dictionary containing icao24 codes
+            as key with their flight distance in nautical miles.
+        max_url_length (int): Maximum length of the request URL of a chunk.
+
+    Returns:
+        List[Dict[str, float]]: The chunks of flights.
+    """
+    empty_url_length = len(_get_url({}))
+    chunks: List[Dict[str, float]] = []
+    chunk: Dict[str, float] = {}
+    url_length = empty_url_length
+    for icao24, distance in icao24_distance.items():
+        # every flight adds its icao24, its distance and two commas
+        flight_length = len(icao24) + len(_format_distance(distance)) + 2
+        if chunk and url_length + flight_length > max_url_length:
+            chunks.append(chunk)
+            chunk = {}
+            url_length = empty_url_length
+        chunk[icao24] = distance
+        url_length += flight_length
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def get_flight_fuel_consumption(
+    icao24_distance: Dict[str, float], budget: float = FUEL_API_BUDGET_SECONDS
+) -> Optional[List[Dict[str, Any]]]:
     """Retrieves the fuel consumption of flights.
 
+    Large batches are split into chunks with URLs of at most MAX_URL_LENGTH, which
+    are requested concurrently. All chunks share the budget, chunks that failed or
+    did not respond within it are missing from the result.
+
+    Returns None without waiting longer than budget seconds if no chunk succeeded,
+    and immediately while the circuit breaker of the API is open.
+
     Args:
         icao24_distance (Dict[str, float]): Dictionary containing icao24 codes
             as key with their flight distance in nautical miles.
+        budget (float): Maximum seconds to wait for the responses.
     """
-    url = (
-        f"https://despouy.ca/flight-fuel-api/q/?aircraft={','.join(icao24_distance.keys())}"
-        f"&distance={','.join(str(val) for val in icao24_distance.values())}"
+    futures: List[Future] = []
+    for chunk in split_into_chunks(icao24_distance):
+        if not FUEL_API_BREAKER.allow_request():
+            break
+        futures.append(_start_request(chunk))
+    if not futures:
+        return None
+
+    # the requests run in their own threads, so the caller can stop waiting for them
+    done, not_done = wait(futures, timeout=budget)
+    if not_done:
+        print(f"The fuel consumption request exceeded its budget of {budget} s")
+
+    flights: Dict[str, Dict[str, Any]] = {}
+    for future in futures:
+        result = future.result() if future in done else None
+        FUEL_API_BREAKER.record(result is not None)
+        for flight in result or []:
+            flights.setdefault(flight["icao24"], flight)
+    return list(flights.values()) if flights else None
+
+
+def _start_request(icao24_distance: Dict[str, float]) -> Future:
+    """Requests the fuel consumption of flights in a new daemon thread."""
+    future: Future = Future()
+
+    def request() -> None:
+        try:
+            future.set_result(_request_flight_fuel_consumption(icao24_distance))
+        except Exception as error:
+            future.set_exception(error)
+
+    Thread(target=request, name="fuel-api", daemon=True).start()
+    return future
+
+
+def _format_distance(distance: float) -> str:
+    """Formats a distance for the query string, metre precision is sufficient."""
+    return str(round(distance, 3))
+
+
+def _get_url(icao24_distance: Dict[str, float]) -> str:
+    """Returns the request URL of the fuel consumption of flights."""
+    return (
+        f"{FUEL_API_URL}?aircraft={','.join(icao24_distance.keys())}"
+        f"&distance={','.join(_format_distance(val) for val in icao24_distance.values())}"
     )
+
+
+def _request_flight_fuel_consumption(
+    icao24_distance: Dict[str, float],
+) -> Optional[List[Dict[str, Any]]]:
+    """Requests the fuel consumption of flights from the API."""
+    import requests
+
     try:
-        response = requests.get(url, timeout=(10))
+        response = _get_session().get(_get_url(icao24_distance), timeout=(10))
 
         if response.ok:
             return response.json()
@@ -23,3 +246,6 @@ def get_flight_fuel_consumption(icao24_distance: Dict[str, float]) -> Optional[D
     except requests.exceptions.Timeout:
         print("The request timed out")
         return None
+    except (requests.exceptions.RequestException, ValueError) as error:
+        print(f"The fuel consumption request failed: {error}")
+        return None
@@ -0,0 +1,142 @@
+import math
+from typing import List, Sequence, Tuple
+
+# Mean earth radius in kilometers, the same as used by geopy's great_circle
+EARTH_RADIUS_KM = 6371.009
+
+KM_PER_NAUTICAL_MILE = 1.852
+
+
+def km_to_nautical(kilometers: float) -> float:
+    """Converts a distance in kilometers to nautical miles."""
+    return kilometers / KM_PER_NAUTICAL_MILE
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Returns the great circle distance between two positions in kilometers.
+
+    Args:
+        lat1 (float): Latitude of the first position in degrees.
+        lon1 (float): Longitude of the first position in degrees.
+        lat2 (float): Latitude of the second position in degrees.
+        lon2 (float): Longitude of the second position in degrees.
+
+    Returns:
+        float: Distance in kilometers on a sphere with the mean earth radius.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    sin_dphi = math.sin((phi2 - phi1) / 2)
+    sin_dlambda = math.sin(math.radians(lon2 - lon1) / 2)
+    a = sin_dphi * sin_dphi + math.cos(phi1) * math.cos(phi2) * sin_dlambda * sin_dlambda
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def haversine_km_batch(
+    positions1: Sequence[Tuple[float, float]], positions2: Sequence[Tuple[float, float]]
+) -> List[float]:
+    """Returns the great circle distances between pairs of positions in kilometers.
+
+    Args:
+        positions1 (Sequence[Tuple[float, float]]): First positions in the format
+            (latitude, longitude) in degrees.
+        positions2 (Sequence[Tuple[float, float]]): Second positions, paired with
+            the first positions by index.
+
+    Returns:
+        List[float]: Distance of every pair in kilometers.
+    """
+    sin, cos, asin, sqrt = math.sin, math.cos, math.asin, math.sqrt
+    to_rad = math.pi / 180
+    diameter = 2 * EARTH_RADIUS_KM
+
+    distances = []
+    for (lat1, lon1), (lat2, lon2) in zip(positions1, positions2):
+        phi1 = lat1 * to_rad
+        phi2 = lat2 * to_rad
+        sin_dphi = sin((phi2 - phi1) / 2)
+        sin_dlambda = sin((lon2 - lon1) * to_rad / 2)
+        a = sin_dphi * sin_dphi + cos(phi1) * cos(phi2) * sin_dlambda * sin_dlambda
+        distances.append(diameter * asin(sqrt(min(a, 1.0))))
+    return distances
+
+
+class LocalProjection:
+    """Planar distance approximation within a bounding box.
+
+    Positions are projected onto a plane tangent to the center latitude of the
+    bounding box. The shrinking of longitude degrees towards the poles is
+    corrected linearly around the center latitude, so every distance needs only
+    plain arithmetic and one square root.
+
+    Args:
+        bounding_box (Tuple): Bounding box of the projected area.
+            bounding box = (lamin, lomin, lamax, lomax)
+    """
+
+    def __init__(self, bounding_box: Tuple[float, float, float, float]) -> None:
+        lamin, lomin, lamax, lomax = bounding_box
+        self.reference_latitude = math.radians((lamin + lamax) / 2)
+        self.cos_reference = math.cos(self.reference_latitude)
+        self.sin_reference = math.sin(self.reference_latitude)
+
+        # The linear correction of cos(latitude) deviates at most by half the
+        # squared latitude offset. Neglecting the curvature of the earth adds an
+        # error of the order of the squared ratio of distance and earth radius.
+        half_span = math.radians(lamax - lamin) / 2
+        min_cos = min(math.cos(math.radians(lamin)), math.cos(math.radians(lamax)))
+        diagonal = haversine_km(lamin, lomin, lamax, lomax)
+        self.max_relative_error = (
+            half_span * half_span / 2 / min_cos if min_cos > 0 else math.inf
+        ) + (diagonal / EARTH_RADIUS_KM) ** 2
+
+    def distance_km(
+        self, position1: Tuple[float, float], position2: Tuple[float, float]
+    ) -> float:
+        """Returns the approximate distance between two positions in kilometers.
+
+        Args:
+            position1 (Tuple[float, float]): First position as (latitude, longitude).
+            position2 (Tuple[float, float]): Second position as (latitude, longitude).
+
+        Returns:
+            float: Distance in kilometers, with relative error of at most
+                max_relative_error for positions within the bounding box.
+        """
+        (lat1, lon1), (lat2, lon2) = position1, position2
+        mid_offset = math.radians((lat1 + lat2) / 2) - self.reference_latitude
+        dx = math.radians(lon2 - lon1) * (
+            self.cos_reference - self.sin_reference * mid_offset
+        )
+        dy = math.radians(lat2 - lat1)
+        return EARTH_RADIUS_KM * math.sqrt(dx * dx + dy * dy)
+
+    def distance_km_batch(
+        self,
+        positions1: Sequence[Tuple[float, float]],
+        positions2: Sequence[Tuple[float, float]],
+    ) -> List[float]:
+        """Returns the approximate distances between pairs of positions in kilometers.
+
+        Args:
+            positions1 (Sequence[Tuple[float, float]]): First positions in the format
+                (latitude, longitude) in degrees.
+            positions2 (Sequence[Tuple[float, float]]): Second positions, paired with
+                the first positions by index.
+
+        Returns:
+            List[float]: Distance of every pair in kilometers.
+        """
+        to_rad = math.pi / 180
+        reference = self.reference_latitude
+        cos_reference = self.cos_reference
+        sin_reference = self.sin_reference
+        radius = EARTH_RADIUS_KM
+
+        distances = []
+        for (lat1, lon1), (lat2, lon2) in zip(positions1, positions2):
+            mid_offset = (lat1 + lat2) * to_rad / 2 - reference
+            dx = (lon2 - lon1) * to_rad * (cos_reference - sin_reference * mid_offset)
+            dy = (lat2 - lat1) * to_rad
+            distances.append(radius * (dx * dx + dy * dy) ** 0.5)
+        return distances
@@ -0,0 +1,142 @@
+import time
+from collections import OrderedDict
+from threading import Condition
+from typing import Any, Dict, Hashable, Optional
+
+
+class _PendingJob:
+    """Job waiting in a JobQueue with the times it was put in the queue."""
+
+    def __init__(
+        self, item: Any, put_time: float, max_delay: Optional[float], keyed: bool
+    ) -> None:
+        self.item = item
+        self.keyed = keyed
+        # time of the oldest run merged into the job, to measure the lag
+        self.first_put_time = put_time
+        # time of the latest run merged into the job, to detect stale jobs
+        self.last_put_time = put_time
+        self.max_delay = max_delay
+
+
+class JobQueue:
+    """Bounded job queue merging pending jobs with the same key.
+
+    A job put while a job with the same key is still waiting is merged into the
+    waiting job, which keeps its position in the queue. Jobs waiting longer than
+    their maximum delay since their latest put are dropped instead of run, and
+    jobs put into a full queue are rejected. Both are counted in the metrics.
+
+    The interface for workers matches queue.Queue: put, get and task_done.
+
+    Args:
+        maxsize (int): Maximum number of waiting jobs. Defaults to 64.
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self.maxsize = maxsize
+        self.condition = Condition()
+        self.pending: "OrderedDict[Hashable, _PendingJob]" = OrderedDict()
+        # seconds the latest run of every key waited before it started
+        self.lag: Dict[Hashable, float] = {}
+        self.metrics = {
+            "put": 0,
+            "coalesced": 0,
+            "stale": 0,
+            "overflow": 0,
+            "started": 0,
+            "done": 0,
+        }
+
+    def put(
+        self,
+        item: Any,
+        key: Optional[Hashable] = None,
+        max_delay: Optional[float] = None,
+    ) -> bool:
+        """Puts a job into the queue or merges it into a waiting job with its key.
+
+        Never blocks, so the scheduler is not held up by slow workers.
+
+        Args:
+            item (Any): The job.
+            key (Hashable, optional): Key of the job, e.g. its tags. Jobs without key
+                are never merged.
+            max_delay (float, optional): Seconds after which the job is dropped if it
+                did not start. Jobs without maximum delay are never dropped.
+
+        Returns:
+            bool: Whether the job was queued or merged, False if the queue is full.
+        """
+        now = time.monotonic()
+        with self.condition:
+            self.metrics["put"] += 1
+            keyed = key is not None
+            if key is None:
+                key = object()
+
+            pending = self.pending.get(key)
+            if pending is not None:
+                pending.item = item
+                pending.last_put_time = now
+                pending.max_delay = max_delay
+                self.metrics["coalesced"] += 1
+                return True
+
+            if len(self.pending) >= self.maxsize:
+                self.metrics["overflow"] += 1
+                return False
+
+            self.pending[key] = _PendingJob(item, now, max_delay, keyed)
+            self.condition.notify()
+            return True
+
+    def get(self) -> Any:
+        """Removes and returns the next job that is not stale, waits for one if needed."""
+        with self.condition:
+            while True:
+                while not self.pending:
+                    self.condition.wait()
+
+                key, pending = self.pending.popitem(last=False)
+                now = time.monotonic()
+                if (
+                    pending.max_delay is not None
+                    and now - pending.last_put_time > pending.max_delay
+                ):
+                    self.metrics["stale"] += 1
+                    continue
+
+                if pending.keyed:
+                    self.lag[key] = now - pending.first_put_time
+                self.metrics["started"] += 1
+                return pending.item
+
+    def task_done(self) -> None:
+        """Marks the last job returned by get as done."""
+        with self.condition:
+            self.metrics["done"] += 1
+
+    def qsize(self) -> int:
+        """Returns the number of waiting jobs."""
+        with self.condition:
+            return len(self.pending)
+
+    def get_lag(self) -> Dict[Hashable, float]:
+        """Returns how many seconds every key is behind.
+
+        That is the waiting time of its oldest merged run if a job of the key is
+        waiting, otherwise the time its latest run waited before it started.
+        """
+        now = time.monotonic()
+        with self.condition:
+            lag = dict(self.lag)
+            for key, pending in self.pending.items():
+                if pending.keyed:
+                    lag[key] = now - pending.first_put_time
+            return lag
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Returns the counters of put, merged, stale, rejected, started and done jobs."""
+        with self.condition:
+            return {**self.metrics, "waiting": len(self.pending)}
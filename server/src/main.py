@@ -1,16 +1,23 @@
-import schedule
 import time
 import json
 import os
 from threading import Thread
 from datetime import datetime, timedelta
-from typing import Callable, Tuple, List, Hashable, Any, Dict
-from queue import Queue
+from typing import Callable, Tuple, List, Hashable, Any, Dict, Optional, Union
 from argparse import ArgumentParser
 
-from opensky_network import get_states_of_bounding_box, get_flights_by_aircrafts
+from aircraft_registry import AircraftRegistry
+from opensky_network import OpenSkyAccountPool, get_flights_by_aircrafts
 from carbon_computation import StateCarbonComputation, get_carbon_by_distance
-from database import Database, DatabaseError, RedisDatabase
+from database import Database, DatabaseError, create_database
+from emission_stream import (
+    TotalEmissionConsumer,
+    HourlySnapshotConsumer,
+    consume_emission_events_job,
+)
+from job_queue import JobQueue
+from profiling import PROFILING_POLL_SECONDS, Profiler
+from state_archive import StateArchiveWriter
 
 BOUNDING_BOXES = {
     "berlin": (52.3418234221, 13.0882097323, 52.6697240587, 13.7606105539),
@@ -19,6 +26,21 @@ BOUNDING_BOXES = {
     "madrid": (40.312817, -3.831991, 40.561061, -3.524374),
 }
 
+# Seconds of the schedule time units
+TIME_UNIT_SECONDS = {
+    "seconds": 1,
+    "minutes": 60,
+    "hours": 3600,
+    "days": 24 * 3600,
+    "weeks": 7 * 24 * 3600,
+}
+
+# Seconds a job may lag behind its schedule before its queue is reported
+REPORTED_JOB_LAG = 60
+
+# Seconds a states response of an airspace is reused by airspaces inside of it
+SNAPSHOT_MAX_AGE = 30
+
 CELEB_AIRCRAFTS = {
     "Bill Gates": ["AC39D6", "A17907"],
     "Michael Jordan": ["A21FE6"],
@@ -54,7 +76,7 @@ class Worker(Thread):
 
     def __init__(self) -> None:
         super().__init__()
-        self.jobqueue: Queue = Queue()
+        self.jobqueue = JobQueue()
 
     def run(self) -> None:
         """Execute all incoming jobs in the job queue."""
@@ -82,6 +104,41 @@ def argparser() -> ArgumentParser:
 
     parser.add_argument("--db_port", type=int, default=6379)
 
+    parser.add_argument(
+        "--db_backend",
+        type=str,
+        choices=["redis", "sqlite", "memory"],
+        help="Storage backend, sqlite and memory do not need a running database server",
+        default="redis",
+    )
+
+    parser.add_argument(
+        "--db_path",
+        type=str,
+        help="Path to the database file of the sqlite backend",
+        default="carbon.db",
+    )
+
+    parser.add_argument(
+        "--emission_stream",
+        action="store_true",
+        help="Publish emissions to the event stream and derive totals from consumers",
+    )
+
+    parser.add_argument(
+        "--archive_dir",
+        type=str,
+        help="Directory to archive the state vectors of every cycle for recomputations",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--profile_dir",
+        type=str,
+        help="Directory to write profiles of jobs to, requested with profiling.py",
+        default=None,
+    )
+
     return parser
 
 
@@ -89,6 +146,10 @@ def main() -> None:
     """Entry point of the application."""
     args = argparser().parse_args()
 
+    # imported after parsing the arguments, like the other heavy dependencies which
+    # are imported on first use
+    import schedule
+
     # Read credentials from config file or json-string
     accounts = {}
     if os.path.isfile(args.accounts):
@@ -97,8 +158,8 @@ def main() -> None:
     else:
         accounts = json.loads(args.accounts)
 
-    # Connect to Redis Database
-    db = RedisDatabase(host=args.db_host, port=args.db_port)
+    # Connect to Database
+    db = create_database(args.db_backend, args.db_host, args.db_port, args.db_path)
     try:
         db.is_running()
     except DatabaseError:
@@ -111,15 +172,32 @@ def main() -> None:
     if db.get_server_startup_time() == 0:
         db.set_server_startup_time(datetime.now())
 
+    # Profile jobs on request, if enabled
+    profiler = Profiler(db, args.profile_dir) if args.profile_dir else None
+
     # Initialize worker threads for computation
     worker_threads = create_carbon_computer_workers(
-        db, BOUNDING_BOXES, CELEB_AIRCRAFTS, accounts
+        db,
+        BOUNDING_BOXES,
+        CELEB_AIRCRAFTS,
+        accounts,
+        args.emission_stream,
+        args.archive_dir,
+        profiler,
     )
 
     # Start worker threads
     for worker_thread in worker_threads:
         worker_thread.start()
 
+    # Report workers falling behind their schedule
+    schedule.every(10).minutes.do(report_job_queues_job, worker_threads)
+
+    # Read profiling requests
+    if profiler is not None:
+        profiler.refresh()
+        schedule.every(PROFILING_POLL_SECONDS).seconds.do(profiler.refresh)
+
     # Start the first carbon caclulation job now instead of waiting
     for job in schedule.get_jobs("state_computation"):
         job.run()
@@ -136,7 +214,10 @@ def create_carbon_computer_workers(
     db: Database,
     bounding_boxes: Dict[str, Tuple[float, float, float, float]],
     celeb_aircrafts: Dict[str, List[str]],
-    accounts: Dict[str, Dict[str, str]],
+    accounts: Union[Dict[str, Dict[str, str]], List[Dict[str, str]]],
+    emission_stream: bool = False,
+    archive_dir: Optional[str] = None,
+    profiler: Optional[Profiler] = None,
 ) -> List[Worker]:
     """Creates worker threads and provides them with necessary jobs.
 
@@ -146,40 +227,59 @@ def create_carbon_computer_workers(
             watched airspace.
         celeb_aircrafts (Dict[str, List[str]]): Dictionary of celebs with their
             aircraft icaos.
-        accounts (Dict[str, Dict[str, str]]): A dictionary of account information like
-            {AIRSPACE: {"username": USERNAME, "password": PASSWORD}, ...}.
+        accounts (Dict or List): OpenSky accounts shared by all airspaces like
+            [{"username": USERNAME, "password": PASSWORD}, ...]. The former format
+            {AIRSPACE: {"username": USERNAME, "password": PASSWORD}, ...} is
+            accepted as well.
+        emission_stream (bool): Whether emissions are published to the event stream
+            and processed by stream consumers instead of the airspace workers.
+        archive_dir (str, optional): Directory to archive the state vectors of every
+            cycle in. Nothing is archived if None.
+        profiler (Profiler, optional): Profiler of the jobs. Jobs are not profiled if
+            None.
 
     Returns:
         List[Worker]: List of worker threads to be started.
     """
     worker_threads = []
 
-    # Create one worker thread for each airspace if username and password were provided
-    for airspace, bounding_box in bounding_boxes.items():
-        if (
-            accounts.get(airspace)
-            and accounts[airspace].get("username")
-            and accounts[airspace].get("password")
-        ):
-            carbon_computer = StateCarbonComputation(airspace, bounding_box)
-            worker_thread = Worker()
+    # Aircraft states are shared by all airspaces
+    registry = AircraftRegistry()
 
-            # Make carbon computation every minute
-            schedule_job_function(
-                worker=worker_thread,
-                job_func=update_total_co2_emission_job,
-                time_unit="minutes",
-                interval=1,
-                tags=["state_computation", carbon_computer.airspace_name],
-                db=db,
-                username=accounts[airspace].get("username"),
-                password=accounts[airspace].get("password"),
-                carbon_computer=carbon_computer,
-            )
+    # Every airspace requests its states with the accounts of a shared pool
+    account_pool = OpenSkyAccountPool.from_config(accounts)
+    watched_airspaces = bounding_boxes if account_pool.accounts else {}
+    if not account_pool.accounts:
+        print("Missing OpenSky credentials. Skipping airspaces...", flush=True)
 
-            # Store total carbon value every hour
+    # Create one worker thread for each airspace if credentials were provided
+    for airspace, bounding_box in watched_airspaces.items():
+        carbon_computer = StateCarbonComputation(
+            airspace, bounding_box, registry=registry
+        )
+        worker_thread = Worker()
+
+        # Make carbon computation every minute
+        schedule_job_function(
+            worker=worker_thread,
+            profiler=profiler,
+            job_func=update_total_co2_emission_job,
+            time_unit="minutes",
+            interval=1,
+            tags=["state_computation", carbon_computer.airspace_name],
+            db=db,
+            account_pool=account_pool,
+            carbon_computer=carbon_computer,
+            emission_stream=emission_stream,
+            archive=(StateArchiveWriter(archive_dir, airspace) if archive_dir else None),
+            registry=registry,
+        )
+
+        # Store total carbon value every hour, unless a stream consumer does
+        if not emission_stream:
             schedule_job_function(
                 worker=worker_thread,
+                profiler=profiler,
                 job_func=store_co2_emission_job,
                 time_unit="hours",
                 interval=1,
@@ -187,14 +287,13 @@ def create_carbon_computer_workers(
                 db=db,
                 carbon_computer=carbon_computer,
             )
-            worker_thread.daemon = True
-            worker_threads.append(worker_thread)
-        else:
-            print(f"Missing credentials for {airspace}. Skipping...", flush=True)
+        worker_thread.daemon = True
+        worker_threads.append(worker_thread)
 
     celeb_thread = Worker()
     schedule_job_function(
         worker=celeb_thread,
+        profiler=profiler,
         job_func=update_celeb_emission_job,
         time_unit="hours",
         interval=1,
@@ -205,6 +304,21 @@ def create_carbon_computer_workers(
     celeb_thread.daemon = True
     worker_threads.append(celeb_thread)
 
+    if emission_stream:
+        # Process published emissions every few seconds
+        consumer_thread = Worker()
+        schedule_job_function(
+            worker=consumer_thread,
+            profiler=profiler,
+            job_func=consume_emission_events_job,
+            time_unit="seconds",
+            interval=5,
+            tags=["emission_consumption"],
+            consumers=[TotalEmissionConsumer(db), HourlySnapshotConsumer(db)],
+        )
+        consumer_thread.daemon = True
+        worker_threads.append(consumer_thread)
+
     return worker_threads
 
 
@@ -215,20 +329,32 @@ def schedule_job_function(
     interval: int,
     tags: List[Hashable] = [],
     *args: Any,
+    max_delay: Optional[float] = None,
+    profiler: Optional[Profiler] = None,
     **kwargs: Any,
 ) -> None:
     """Schedules a job to be put in a worker thread jobqueue.
 
+    A run scheduled while the previous run of the job is still waiting in the
+    queue is merged into it. Runs not started within max_delay are dropped.
+
     Args:
         worker (Worker): Worker thread that should execute the job at given interval.
         job_func (Callable): Function that should be executed by worker at given interval.
         time_unit (str): The measure of time intervals that the job should be executed.
             Can be seconds, minutes, hours, days or weeks.
         interval (int): The interval at which the scheduled job should be executed.
-        tags (List[Hashable]): Tags to mark the scheduled job.
+        tags (List[Hashable]): Tags to mark the scheduled job. Runs of jobs with the
+            same tags are merged.
         *args: Positional arguments to be passed to the job function.
+        max_delay (float, optional): Seconds after which a run is dropped if it did
+            not start. Defaults to the interval of the job.
+        profiler (Profiler, optional): Profiler of the job, which profiles its runs
+            as job:TAG1:TAG2... on request.
         **kwargs: Keyword arguments to be passed to the job function.
     """
+    import schedule
+
     time_mapping = {
         "seconds": schedule.every(interval).seconds,
         "minutes": schedule.every(interval).minutes,
@@ -239,14 +365,47 @@ def schedule_job_function(
 
     schedule_func = time_mapping.get(time_unit)
 
+    if profiler is not None:
+        job_func = profiler.wrap(job_func, ":".join(["job", *map(str, tags)]))
+
     if schedule_func:
-        schedule_func.do(worker.jobqueue.put, (job_func, args, kwargs)).tag(*tags)
+        if max_delay is None:
+            max_delay = interval * TIME_UNIT_SECONDS[time_unit]
+        schedule_func.do(
+            worker.jobqueue.put,
+            (job_func, args, kwargs),
+            key=tuple(tags),
+            max_delay=max_delay,
+        ).tag(*tags)
     else:
         print("Invalid time unit", flush=True)
 
 
+def report_job_queues_job(workers: List[Worker]) -> None:
+    """Prints the job queue metrics of workers lagging behind their schedule.
+
+    Args:
+        workers (List[Worker]): Worker threads to report.
+    """
+    for worker in workers:
+        lag = worker.jobqueue.get_lag()
+        metrics = worker.jobqueue.get_metrics()
+        if (
+            any(seconds > REPORTED_JOB_LAG for seconds in lag.values())
+            or metrics["stale"]
+            or metrics["overflow"]
+        ):
+            behind = ", ".join(f"{key}: {seconds:.0f} s" for key, seconds in lag.items())
+            print(f"{worker.name} lag - {behind} - {metrics}", flush=True)
+
+
 def update_total_co2_emission_job(
-    db: Database, username: str, password: str, carbon_computer: StateCarbonComputation
+    db: Database,
+    account_pool: OpenSkyAccountPool,
+    carbon_computer: StateCarbonComputation,
+    emission_stream: bool = False,
+    archive: Optional[StateArchiveWriter] = None,
+    registry: Optional[AircraftRegistry] = None,
 ) -> None:
     """Wrapper function for updating the total co2 emission.
 
@@ -254,21 +413,64 @@ def update_total_co2_emission_job(
 
     Args:
         db (Database): Carbon data storage.
-        username (str): The username for authentication.
-        password (str): The password for authentication.
+        account_pool (OpenSkyAccountPool): Accounts to request the states with.
         carbon_computer (CarbonComputation): Class instance to handle the computation
             of carbon emission in specific airspace.
+        emission_stream (bool): Whether to publish the emission to the event stream
+            instead of updating total and ledger directly.
+        archive (StateArchiveWriter, optional): Archive to append the received state
+            vectors to.
+        registry (AircraftRegistry, optional): Registry providing recent states of
+            airspaces containing this airspace instead of requesting them again.
     """
-    res = get_states_of_bounding_box(username, password, carbon_computer.bounding_box)
+    snapshot = None
+    if registry is not None:
+        min_request_time = int(time.time()) - SNAPSHOT_MAX_AGE
+        if carbon_computer.last_request_time is not None:
+            min_request_time = max(
+                min_request_time, carbon_computer.last_request_time + 1
+            )
+        snapshot = registry.get_snapshot(carbon_computer.bounding_box, min_request_time)
+
+    if snapshot is not None:
+        res: Optional[Dict[str, Any]] = {"time": snapshot[0], "states": snapshot[1]}
+    else:
+        res = account_pool.get_states_of_bounding_box(carbon_computer.bounding_box)
+        if res is not None and registry is not None:
+            registry.add_snapshot(
+                carbon_computer.bounding_box, res["time"], res["states"]
+            )
 
     # Compute new emission (response["states"] can be null)
     if res is not None:
+        if archive is not None:
+            archive.append(res["time"], res["states"])
+
+        # Publish the states for on-demand queries of custom areas
+        db.set_state_snapshot(carbon_computer.airspace_name, res["time"], res["states"])
+
         new_emission = carbon_computer.get_co2_emission(res["states"], res["time"])
         print(
             f"New emission in {carbon_computer.airspace_name}: {new_emission}",
             flush=True,
         )
 
+        if emission_stream:
+            # Keep the running total in memory and leave storage to the consumers
+            if carbon_computer.total_emission is None:
+                carbon_computer.total_emission = db.get_total_carbon(
+                    carbon_computer.airspace_name
+                )
+            carbon_computer.total_emission += new_emission
+            db.append_emission_event(
+                carbon_computer.airspace_name,
+                datetime.fromtimestamp(res["time"]),
+                new_emission,
+                carbon_computer.total_emission,
+                carbon_computer.aircraft_emissions,
+            )
+            return
+
         # Update total emission
         total_emission = db.get_total_carbon(carbon_computer.airspace_name) + new_emission
         print(
@@ -276,6 +478,13 @@ def update_total_co2_emission_job(
             flush=True,
         )
         db.set_total_carbon(carbon_computer.airspace_name, total_emission)
+
+        # Book the emission of every aircraft to the ledger of the airspace
+        db.add_aircraft_emissions(
+            carbon_computer.airspace_name,
+            datetime.fromtimestamp(res["time"]),
+            carbon_computer.aircraft_emissions,
+        )
     else:
         print(f"{carbon_computer.airspace_name} - No response from OpenSky Network")
 
@@ -1,7 +1,23 @@
-import requests
-from requests.auth import HTTPBasicAuth
+import codecs
+import json
+import math
+import re
+import time
 from datetime import datetime
-from typing import Optional, Tuple, Dict, List, Any, Union
+from threading import Lock
+from typing import Optional, Tuple, Dict, List, Any, Union, Iterator
+
+# Size of the chunks in which state responses are read and parsed
+STATES_CHUNK_SIZE = 64 * 1024
+
+# Daily api credits of a registered OpenSky Network account
+DAILY_CREDITS = 4000
+
+# Seconds an account is not used after a rate limit response without retry time
+DEFAULT_RETRY_SECONDS = 60
+
+# Seconds an account is not used after its credentials were rejected
+REJECTED_RETRY_SECONDS = 3600
 
 
 def _transform_state_vector(states: List[List[Any]]) -> Dict[str, Dict[str, Any]]:
@@ -16,19 +32,133 @@ def _transform_state_vector(states: List[List[Any]]) -> Dict[str, Dict[str, Any]
             aircrafts and values are dictionaries with data containing position,
             velocity and true_track.
     """
-    current_aircrafts = {}
+    current_aircrafts: Dict[str, Dict[str, Any]] = {}
     for state in states:
-        if state[5] and state[6] and state[9] and state[10]:
-            current_aircrafts[state[0]] = {
-                "last_update": state[4],
-                "position": (state[6], state[5]),
-                "on_ground": state[8],
-                "velocity": state[9],
-                "true_track": state[10],
-            }
+        _add_state_vector(current_aircrafts, state)
     return current_aircrafts
 
 
+def _add_state_vector(
+    current_aircrafts: Dict[str, Dict[str, Any]], state: List[Any]
+) -> None:
+    """Adds the useful information of a single state vector to current_aircrafts.
+
+    State vectors without position, velocity or true track are dropped.
+    """
+    if state[5] and state[6] and state[9] and state[10]:
+        current_aircrafts[state[0]] = {
+            "last_update": state[4],
+            "position": (state[6], state[5]),
+            "on_ground": state[8],
+            "velocity": state[9],
+            "true_track": state[10],
+        }
+
+
+class _StateVectorStream:
+    """Incremental parser of the JSON object of an OpenSky states response.
+
+    The state vectors of the "states" array are returned one by one as soon as
+    they are complete. All other fields of the object are decoded as a whole and
+    kept in the fields instance variable. Only the incomplete rest of the fed text
+    is buffered, so memory does not grow with the number of state vectors.
+    """
+
+    _separators = re.compile(r"[\s,:]*")
+
+    def __init__(self) -> None:
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.state_count = 0
+        self.phase = "object"
+        self.key = ""
+
+    def feed(self, text: str) -> Iterator[List[Any]]:
+        """Parses the next piece of the response text.
+
+        Args:
+            text (str): Next piece of the response text.
+
+        Returns:
+            Iterator[List[Any]]: State vectors completed by the text.
+
+        Raises:
+            ValueError, if the text is not a valid OpenSky states object.
+        """
+        self.buffer += text
+        pos = 0
+        while True:
+            match = self._separators.match(self.buffer, pos)
+            pos = match.end() if match else pos
+            if pos == len(self.buffer):
+                break
+            char = self.buffer[pos]
+
+            if self.phase == "object":
+                if char != "{":
+                    raise ValueError("States response is not a JSON object")
+                pos += 1
+                self.phase = "key"
+            elif self.phase == "key":
+                if char == "}":
+                    pos += 1
+                    self.phase = "done"
+                    continue
+                decoded = self._decode(pos)
+                if decoded is None:
+                    break
+                self.key, pos = decoded
+                if not isinstance(self.key, str):
+                    raise ValueError("States response contains invalid keys")
+                self.phase = "value"
+            elif self.phase == "value":
+                if self.key == "states" and char == "[":
+                    pos += 1
+                    self.phase = "states"
+                    continue
+                decoded = self._decode(pos)
+                if decoded is None:
+                    break
+                self.fields[self.key], pos = decoded
+                self.phase = "key"
+            elif self.phase == "states":
+                if char == "]":
+                    pos += 1
+                    self.phase = "key"
+                    continue
+                decoded = self._decode(pos)
+                if decoded is None:
+                    break
+                state, pos = decoded
+                self.state_count += 1
+                yield state
+            else:
+                raise ValueError("Unexpected data after states response")
+
+        self.buffer = self.buffer[pos:]
+
+    def _decode(self, pos: int) -> Optional[Tuple[Any, int]]:
+        """Decodes the JSON value at pos, None if it might not be complete yet."""
+        try:
+            value, end = self.decoder.raw_decode(self.buffer, pos)
+        except json.JSONDecodeError:
+            return None
+        # numbers at the end of the buffer might continue in the next piece
+        if end == len(self.buffer):
+            return None
+        return value, end
+
+    def close(self) -> None:
+        """Checks that the response was complete.
+
+        Raises:
+            ValueError, if the response ended early or contained invalid JSON.
+        """
+        if self.phase != "done":
+            raise ValueError("States response is incomplete or invalid")
+
+
 def get_states_of_bounding_box(
     username: str, password: str, bounding_box: Tuple[float, float, float, float]
 ) -> Optional[Dict]:
@@ -42,25 +172,211 @@ def get_states_of_bounding_box(
 
     Returns:
         dict: A dictionary containing the response JSON if successful, None
-            otherwise.
+            otherwise. The states are transformed into a dictionary of aircrafts
+            while the response is streamed, so the raw state vectors are never
+            held in memory at once.
+    """
+    return _request_states(username, password, bounding_box)[2]
+
+
+def _request_states(
+    username: str, password: str, bounding_box: Tuple[float, float, float, float]
+) -> Tuple[int, Dict[str, str], Optional[Dict]]:
+    """Requests the states of a bounding box.
+
+    Returns:
+        Tuple[int, Dict[str, str], Optional[Dict]]: Status code and headers of the
+            response, 0 and no headers if there was none, and the response JSON
+            as returned by get_states_of_bounding_box.
     """
     url = (
         f"https://opensky-network.org/api/states/all?lamin={bounding_box[0]}"
         f"&lomin={bounding_box[1]}&lamax={bounding_box[2]}&lomax={bounding_box[3]}"
     )
 
+    # imported on first use, requests is the slowest import of the computation
+    import requests
+
+    status_code: int = 0
+    headers: Dict[str, str] = {}
     try:
-        response = requests.get(url, auth=HTTPBasicAuth(username, password), timeout=(10))
+        response = requests.get(url, auth=(username, password), timeout=(10), stream=True)
+        status_code, headers = response.status_code, dict(response.headers)
+        if not response.ok:
+            return status_code, headers, None
 
-        if response.ok and response.json() and response.json().get("states"):
-            response_json = response.json()
-            response_json["states"] = _transform_state_vector(response_json["states"])
-            return response_json
-        else:
-            return None
+        parser = _StateVectorStream()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        current_aircrafts: Dict[str, Dict[str, Any]] = {}
+        for chunk in response.iter_content(chunk_size=STATES_CHUNK_SIZE):
+            for state in parser.feed(decoder.decode(chunk)):
+                _add_state_vector(current_aircrafts, state)
+        parser.close()
+
+        if not parser.state_count:
+            return status_code, headers, None
+        return status_code, headers, {**parser.fields, "states": current_aircrafts}
     except requests.exceptions.Timeout:
         print("The states-request timed out")
-        return None
+        return status_code, headers, None
+    except ValueError as error:
+        print(f"Invalid states-response: {error}")
+        return status_code, headers, None
+
+
+def get_states_credits(bounding_box: Tuple[float, float, float, float]) -> int:
+    """Returns the api credits a states request of a bounding box costs.
+
+    The OpenSky Network charges by the area of the bounding box in square degrees.
+    """
+    area = (bounding_box[2] - bounding_box[0]) * (bounding_box[3] - bounding_box[1])
+    if area <= 25:
+        return 1
+    if area <= 100:
+        return 2
+    if area <= 400:
+        return 3
+    return 4
+
+
+class OpenSkyAccount:
+    """Credentials and rate limit state of an OpenSky Network account.
+
+    Args:
+        username (str): The username for authentication.
+        password (str): The password for authentication.
+    """
+
+    def __init__(self, username: str, password: str) -> None:
+        self.username = username
+        self.password = password
+        # credits left as reported by the last response or estimated until then
+        self.remaining_credits = DAILY_CREDITS
+        # time.monotonic() before which the account is throttled
+        self.retry_at = 0.0
+        self.requests = 0
+        self.rate_limited = 0
+
+
+class OpenSkyAccountPool:
+    """Pool of OpenSky Network accounts shared by all airspaces.
+
+    Every request is sent with the available account with the most remaining
+    credits. The credits are read from the rate limit headers of the responses.
+    If an account is rate limited or its credentials are rejected, it is not
+    used until its retry time and the request is retried with the next account.
+
+    All methods are thread safe.
+
+    Args:
+        accounts (List[OpenSkyAccount]): The accounts of the pool.
+    """
+
+    def __init__(self, accounts: List[OpenSkyAccount]) -> None:
+        self.accounts = accounts
+        self.lock = Lock()
+
+    @classmethod
+    def from_config(
+        cls, config: Union[Dict[str, Dict[str, str]], List[Dict[str, str]]]
+    ) -> "OpenSkyAccountPool":
+        """Creates a pool of all distinct accounts with username and password.
+
+        Args:
+            config (Dict or List): Account information, either as list of
+                {"username": USERNAME, "password": PASSWORD} or in the former
+                format of accounts per airspace {AIRSPACE: {...}, ...}.
+        """
+        entries = config.values() if isinstance(config, dict) else config
+        accounts: Dict[str, OpenSkyAccount] = {}
+        for entry in entries:
+            if entry.get("username") and entry.get("password"):
+                accounts.setdefault(
+                    entry["username"],
+                    OpenSkyAccount(entry["username"], entry["password"]),
+                )
+        return cls(list(accounts.values()))
+
+    def _acquire(
+        self, credits: int, excluded: List[OpenSkyAccount]
+    ) -> Optional[OpenSkyAccount]:
+        """Returns the available account with the most credits and reserves credits."""
+        now = time.monotonic()
+        with self.lock:
+            available = [
+                account
+                for account in self.accounts
+                if account.retry_at <= now and account not in excluded
+            ]
+            if not available:
+                return None
+            account = max(available, key=lambda account: account.remaining_credits)
+            account.remaining_credits -= credits
+            account.requests += 1
+            return account
+
+    def _release(
+        self, account: OpenSkyAccount, status_code: int, headers: Dict[str, str]
+    ) -> None:
+        """Updates the rate limit state of an account from a response."""
+        with self.lock:
+            remaining = headers.get("X-Rate-Limit-Remaining")
+            if remaining is not None and remaining.isdigit():
+                account.remaining_credits = int(remaining)
+
+            if status_code == 429:
+                account.rate_limited += 1
+                retry_after = headers.get("X-Rate-Limit-Retry-After-Seconds", "")
+                account.retry_at = time.monotonic() + (
+                    int(retry_after) if retry_after.isdigit() else DEFAULT_RETRY_SECONDS
+                )
+                account.remaining_credits = 0
+            elif status_code in (401, 403):
+                print(f"Credentials of OpenSky account {account.username} rejected")
+                account.retry_at = time.monotonic() + REJECTED_RETRY_SECONDS
+
+    def get_states_of_bounding_box(
+        self, bounding_box: Tuple[float, float, float, float]
+    ) -> Optional[Dict]:
+        """Retrieves the states of aircraft within a bounding box with the pool.
+
+        Args:
+            bounding_box (tuple[float, float, float, float]): The coordinates of the
+                bounding box in the format (lamin, lomin, lamax, lomax).
+
+        Returns:
+            dict: The response of get_states_of_bounding_box of the first account
+                that is not rate limited, None if all accounts are.
+        """
+        credits = get_states_credits(bounding_box)
+        tried: List[OpenSkyAccount] = []
+        while True:
+            account = self._acquire(credits, tried)
+            if account is None:
+                print("All OpenSky accounts are rate limited")
+                return None
+            tried.append(account)
+
+            status_code, headers, res = _request_states(
+                account.username, account.password, bounding_box
+            )
+            self._release(account, status_code, headers)
+            if status_code not in (401, 403, 429):
+                return res
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns requests, rate limit responses and remaining credits per account."""
+        now = time.monotonic()
+        with self.lock:
+            return {
+                account.username: {
+                    "requests": account.requests,
+                    "rate_limited": account.rate_limited,
+                    "remaining_credits": account.remaining_credits,
+                    "throttled_seconds": max(0, math.ceil(account.retry_at - now)),
+                }
+                for account in self.accounts
+            }
 
 
 def get_flights_by_aircrafts(
@@ -84,6 +400,8 @@ def get_flights_by_aircrafts(
         f"&begin={start_time}&end={end_time}"
     )
 
+    import requests
+
     try:
         response = requests.get(url, timeout=(10))
 
@@ -0,0 +1,292 @@
+import json
+import os
+import re
+import sys
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from threading import Event, Lock, Thread, get_ident
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+from database import Database, DatabaseError, create_database
+
+# Name of the database setting with the current profiling request
+PROFILING_SETTING = "profiling"
+
+# Seconds between two reads of the profiling request by every process
+PROFILING_POLL_SECONDS = 30
+
+# Seconds between two stack samples of the sampling profiler
+SAMPLE_INTERVAL = 0.005
+
+PROFILING_MODES = ["sample", "trace"]
+
+
+def request_profiling(
+    db: Database,
+    targets: List[str],
+    runs: int = 10,
+    mode: str = "sample",
+    interval: float = SAMPLE_INTERVAL,
+) -> str:
+    """Requests all processes polling the database to profile jobs or routes.
+
+    Args:
+        db (Database): Database polled by the profiled processes.
+        targets (List[str]): Names of profiled jobs and routes. A target matches
+            names equal to it and names starting with it followed by a colon, e.g.
+            "job:state_computation" matches the computation jobs of all airspaces
+            like "job:state_computation:berlin", "route:/api/area/emission"
+            matches a route.
+        runs (int): Number of profiled runs of every name in every process.
+        mode (str): "sample" to sample the stack of the running thread and write
+            folded stacks for flame graphs, "trace" to trace every call with
+            cProfile and write pstats files.
+        interval (float): Seconds between two stack samples in the sample mode.
+
+    Returns:
+        str: Id of the request.
+    """
+    if mode not in PROFILING_MODES:
+        raise ValueError(f"Unknown profiling mode {mode}")
+    request_id = uuid4().hex
+    db.set_setting(
+        PROFILING_SETTING,
+        json.dumps(
+            {
+                "id": request_id,
+                "targets": targets,
+                "runs": runs,
+                "mode": mode,
+                "interval": interval,
+            }
+        ),
+    )
+    return request_id
+
+
+def stop_profiling(db: Database) -> None:
+    """Withdraws the current profiling request."""
+    db.set_setting(PROFILING_SETTING, None)
+
+
+class _StackSampler(Thread):
+    """Thread counting the stacks of another thread at a fixed interval."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stopped = Event()
+        self.stacks: Counter = Counter()
+
+    def run(self) -> None:
+        """Samples the stack of the thread until the sampler is stopped."""
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> str:
+        """Stops sampling and returns the stacks in the folded format of flame graphs."""
+        self.stopped.set()
+        self.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+class Profiler:
+    """Opt-in profiler of scheduled jobs and api routes, controlled at runtime.
+
+    Profiling is requested through a database setting, see request_profiling,
+    which every process with a profiler reads every PROFILING_POLL_SECONDS on
+    refresh. The next runs of the requested jobs and routes are then profiled
+    and every run is written to its own file in the profile directory. Only one
+    run is profiled at a time per process, others run unprofiled meanwhile.
+
+    Without a profiling request, wrapped jobs and routes only check whether
+    their name is a requested target.
+
+    Args:
+        db (Database): Database with the profiling request.
+        directory (str): Directory the profiles are written to.
+        poll_seconds (float): Seconds between two reads of the profiling request.
+    """
+
+    def __init__(
+        self, db: Database, directory: str, poll_seconds: float = PROFILING_POLL_SECONDS
+    ) -> None:
+        self.db = db
+        self.directory = directory
+        self.poll_seconds = poll_seconds
+        self.lock = Lock()
+        self.profiling = Lock()
+        self.last_poll = -float("inf")
+        self.request: Optional[Dict[str, Any]] = None
+        self.targets: List[str] = []
+        # profiled runs of every name for the current request
+        self.runs: Counter = Counter()
+        os.makedirs(directory, exist_ok=True)
+
+    def claim_refresh(self) -> bool:
+        """Returns whether the request is due to be read, True once per poll interval."""
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_poll < self.poll_seconds:
+                return False
+            self.last_poll = now
+            return True
+
+    def refresh(self) -> None:
+        """Reads the profiling request from the database."""
+        try:
+            setting = self.db.get_setting(PROFILING_SETTING)
+        except DatabaseError as error:
+            print(f"Could not read the profiling request: {error}")
+            return
+
+        request = json.loads(setting) if setting else None
+        with self.lock:
+            self.last_poll = time.monotonic()
+            if (
+                request is None
+                or self.request is None
+                or request["id"] != self.request["id"]
+            ):
+                self.runs.clear()
+                if request is not None:
+                    print(f"Profiling {', '.join(request['targets'])}")
+            self.request = request
+            self.targets = request["targets"] if request else []
+
+    def is_target(self, name: str) -> bool:
+        """Returns whether name is matched by a target of the profiling request."""
+        return any(
+            name == target or name.startswith(f"{target}:") for target in self.targets
+        )
+
+    def profile(self, name: str) -> ContextManager[None]:
+        """Returns a context manager profiling its body if name is requested."""
+        if not self.targets or not self.is_target(name):
+            return nullcontext()
+
+        with self.lock:
+            request = self.request
+            if request is None or self.runs[name] >= request["runs"]:
+                return nullcontext()
+            if not self.profiling.acquire(blocking=False):
+                return nullcontext()
+            self.runs[name] += 1
+        return self._profile(name, request)
+
+    @contextmanager
+    def _profile(self, name: str, request: Dict[str, Any]) -> Iterator[None]:
+        """Profiles the body as a run of name, expects the profiling lock to be held."""
+        start = time.perf_counter()
+        try:
+            if request["mode"] == "trace":
+                import cProfile
+
+                tracer = cProfile.Profile()
+                tracer.enable()
+                try:
+                    yield
+                finally:
+                    tracer.disable()
+                    path = self._get_path(name, "prof")
+                    tracer.dump_stats(path)
+            else:
+                sampler = _StackSampler(
+                    get_ident(), request.get("interval", SAMPLE_INTERVAL)
+                )
+                sampler.start()
+                try:
+                    yield
+                finally:
+                    path = self._get_path(name, "folded")
+                    with open(path, "w") as file:
+                        file.write(sampler.stop())
+        finally:
+            self.profiling.release()
+        print(f"Profiled {name} in {time.perf_counter() - start:.3f} s to {path}")
+
+    def _get_path(self, name: str, extension: str) -> str:
+        """Returns a new profile path of a run of name."""
+        filename = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_")
+        return os.path.join(
+            self.directory,
+            f"{filename}-{int(time.time() * 1000)}-{os.getpid()}.{extension}",
+        )
+
+    def wrap(self, function: Callable, name: str) -> Callable:
+        """Returns function with its runs profiled as name if requested."""
+
+        @wraps(function)
+        def profiled(*args: Any, **kwargs: Any) -> Any:
+            with self.profile(name):
+                return function(*args, **kwargs)
+
+        return profiled
+
+
+def argparser() -> ArgumentParser:
+    """Returns command line arguments parser."""
+    parser = ArgumentParser(
+        description="Request profiles of jobs and routes from the running processes"
+    )
+
+    parser.add_argument(
+        "targets",
+        type=str,
+        nargs="*",
+        help="Profiled jobs and routes like job:state_computation:berlin or "
+        "route:/api/area/emission, nothing stops profiling",
+    )
+
+    parser.add_argument("--runs", type=int, default=10)
+
+    parser.add_argument("--mode", type=str, choices=PROFILING_MODES, default="sample")
+
+    parser.add_argument("--interval", type=float, default=SAMPLE_INTERVAL)
+
+    parser.add_argument("--db_host", type=str, default="127.0.0.1")
+
+    parser.add_argument("--db_port", type=int, default=6379)
+
+    parser.add_argument(
+        "--db_backend", type=str, choices=["redis", "sqlite"], default="redis"
+    )
+
+    parser.add_argument("--db_path", type=str, default="carbon.db")
+
+    return parser
+
+
+def main() -> None:
+    """Requests or stops profiling of the running processes."""
+    args = argparser().parse_args()
+    db = create_database(args.db_backend, args.db_host, args.db_port, args.db_path)
+
+    try:
+        db.is_running()
+    except DatabaseError:
+        raise RuntimeError("Database connection failed.")
+
+    if args.targets:
+        request_profiling(db, args.targets, args.runs, args.mode, args.interval)
+        print(f"Requested {args.runs} {args.mode} profiles of {', '.join(args.targets)}")
+    else:
+        stop_profiling(db)
+        print("Stopped profiling")
+
+
+if __name__ == "__main__":
+    main()
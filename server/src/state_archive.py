@@ -0,0 +1,214 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from carbon_computation import StateCarbonComputation
+
+# Time span of a single archive chunk in seconds
+CHUNK_SECONDS = 24 * 3600
+
+# Index record of a cycle: request time, offset and length in the data file
+_INDEX_RECORD = struct.Struct("<qQI")
+
+
+def _encode_states(states: Dict[str, Dict[str, Any]]) -> bytes:
+    """Encodes transformed state vectors as compressed compact JSON."""
+    rows = [
+        [
+            icao24,
+            state["last_update"],
+            state["position"][0],
+            state["position"][1],
+            state["on_ground"],
+            state["velocity"],
+            state["true_track"],
+        ]
+        for icao24, state in states.items()
+    ]
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode("utf-8"))
+
+
+def _decode_states(data: bytes) -> Dict[str, Dict[str, Any]]:
+    """Decodes compressed state vectors into the transformed state format."""
+    return {
+        icao24: {
+            "last_update": last_update,
+            "position": (latitude, longitude),
+            "on_ground": on_ground,
+            "velocity": velocity,
+            "true_track": true_track,
+        }
+        for icao24, last_update, latitude, longitude, on_ground, velocity, true_track in (
+            json.loads(zlib.decompress(data))
+        )
+    }
+
+
+class StateArchiveWriter:
+    """Append-only archive of the state vectors of an airspace.
+
+    Every cycle is compressed and appended to the data file of the chunk
+    containing its request time. A fixed size record per cycle in the index file
+    of the chunk holds request time, offset and length of the cycle. Index
+    records are only written after their data, so readers never see partial
+    cycles.
+
+    Args:
+        directory (str): Root directory of the archive.
+        airspace (str): Name of the archived airspace.
+    """
+
+    def __init__(self, directory: str, airspace: str) -> None:
+        self.directory = os.path.join(directory, airspace)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def append(self, request_time: int, states: Dict[str, Dict[str, Any]]) -> None:
+        """Appends the transformed state vectors of a computation cycle.
+
+        Args:
+            request_time (int): The time of the states request in seconds since epoch.
+            states (Dict[str, Dict[str, Any]]): Transformed state vectors of the
+                aircrafts in the airspace.
+        """
+        chunk = request_time - request_time % CHUNK_SECONDS
+        path = os.path.join(self.directory, str(chunk))
+        data = _encode_states(states)
+
+        with open(f"{path}.dat", "ab") as data_file:
+            offset = data_file.tell()
+            data_file.write(data)
+        with open(f"{path}.idx", "ab") as index_file:
+            index_file.write(_INDEX_RECORD.pack(request_time, offset, len(data)))
+
+
+class StateArchiveReader:
+    """Reader of the archived state vectors of an airspace.
+
+    Index and data files are memory mapped, so only the pages of the requested
+    cycles are read from disk.
+
+    Args:
+        directory (str): Root directory of the archive.
+        airspace (str): Name of the archived airspace.
+    """
+
+    def __init__(self, directory: str, airspace: str) -> None:
+        self.directory = os.path.join(directory, airspace)
+
+    def chunks(self) -> List[int]:
+        """Returns the sorted start times of all chunks of the archive."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            int(name[: -len(".idx")])
+            for name in os.listdir(self.directory)
+            if name.endswith(".idx")
+        )
+
+    def time_range(self) -> Optional[Tuple[int, int]]:
+        """Returns request times of the first and last archived cycle."""
+        times = [time for time, _ in self.iter_cycles(0, 2**62, load_states=False)]
+        return (times[0], times[-1]) if times else None
+
+    def last_cycle_before(self, time: int) -> Optional[int]:
+        """Returns the request time of the last archived cycle before time, if any."""
+        for chunk in reversed(self.chunks()):
+            if chunk >= time:
+                continue
+            path = os.path.join(self.directory, str(chunk))
+            times = [
+                request_time
+                for request_time, _ in self._iter_chunk(path, chunk, time - 1, False)
+            ]
+            if times:
+                return times[-1]
+        return None
+
+    def iter_cycles(
+        self, begin: int, end: int, load_states: bool = True
+    ) -> Iterator[Tuple[int, Dict[str, Dict[str, Any]]]]:
+        """Yields the archived cycles with request time between begin and end.
+
+        Args:
+            begin (int): Start of the time range in seconds since epoch.
+            end (int): End of the time range in seconds since epoch.
+            load_states (bool): Whether to decode the state vectors. If False,
+                empty dictionaries are yielded. Defaults to True.
+
+        Returns:
+            Iterator[Tuple[int, Dict]]: Request time and transformed state vectors
+                of every cycle in ascending order of time.
+        """
+        for chunk in self.chunks():
+            if chunk + CHUNK_SECONDS <= begin or chunk > end:
+                continue
+            path = os.path.join(self.directory, str(chunk))
+            yield from self._iter_chunk(path, begin, end, load_states)
+
+    def _iter_chunk(
+        self, path: str, begin: int, end: int, load_states: bool
+    ) -> Iterator[Tuple[int, Dict[str, Dict[str, Any]]]]:
+        """Yields the cycles of a chunk with request time between begin and end."""
+        index_size = os.path.getsize(f"{path}.idx")
+        count = index_size // _INDEX_RECORD.size
+        if count == 0:
+            return
+
+        with (
+            open(f"{path}.idx", "rb") as index_file,
+            open(f"{path}.dat", "rb") as data_file,
+        ):
+            index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                # binary search for the first cycle not before begin
+                low, high = 0, count
+                while low < high:
+                    middle = (low + high) // 2
+                    record = _INDEX_RECORD.unpack_from(index, middle * _INDEX_RECORD.size)
+                    if record[0] < begin:
+                        low = middle + 1
+                    else:
+                        high = middle
+
+                for position in range(low, count):
+                    request_time, offset, length = _INDEX_RECORD.unpack_from(
+                        index, position * _INDEX_RECORD.size
+                    )
+                    if request_time > end:
+                        break
+                    states = (
+                        _decode_states(data[offset : offset + length])
+                        if load_states
+                        else {}
+                    )
+                    yield request_time, states
+            finally:
+                index.close()
+                data.close()
+
+
+def replay_states(
+    reader: StateArchiveReader,
+    carbon_computer: StateCarbonComputation,
+    begin: int,
+    end: int,
+) -> Iterator[Tuple[int, float]]:
+    """Replays archived cycles into a carbon computation.
+
+    Args:
+        reader (StateArchiveReader): Archive of the airspace.
+        carbon_computer (StateCarbonComputation): Carbon computation receiving the
+            archived states as if they were just requested.
+        begin (int): Start of the replayed time range in seconds since epoch.
+        end (int): End of the replayed time range in seconds since epoch.
+
+    Returns:
+        Iterator[Tuple[int, float]]: Request time and new carbon emission of
+            every replayed cycle.
+    """
+    for request_time, states in reader.iter_cycles(begin, end):
+        yield request_time, carbon_computer.get_co2_emission(states, request_time)
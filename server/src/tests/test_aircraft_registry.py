@@ -0,0 +1,140 @@
+import copy
+from typing import Any, Dict, List, Sequence, Tuple
+
+from aircraft_registry import AircraftRegistry
+from carbon_computation import StateCarbonComputation, get_assumed_carbon_by_aircraft
+from geodesy import haversine_km_batch
+
+REGION = (50.0, 10.0, 54.0, 16.0)
+METRO = (52.0, 13.0, 53.0, 14.0)
+
+
+def make_state(request_time: int, latitude: float, longitude: float) -> Dict[str, Any]:
+    """Returns a transformed state vector of an aircraft flying north-east."""
+    return {
+        "last_update": request_time,
+        "position": (latitude, longitude),
+        "on_ground": False,
+        "velocity": 230.0,
+        "true_track": 45.0,
+    }
+
+
+def make_cycles() -> List[Tuple[int, Dict[str, Dict[str, Any]]]]:
+    """Returns cycles of an aircraft inside the metro area and one outside of it."""
+    cycles = []
+    for index in range(5):
+        request_time = 1_688_515_200 + index * 60
+        cycles.append(
+            (
+                request_time,
+                {
+                    "3c6444": make_state(request_time, 52.2 + index * 0.1, 13.2),
+                    "4b1805": make_state(request_time, 51.0, 11.0 + index * 0.1),
+                },
+            )
+        )
+    return cycles
+
+
+class CountingDistances:
+    """Haversine distance function counting the computed distances."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(
+        self,
+        positions1: Sequence[Tuple[float, float]],
+        positions2: Sequence[Tuple[float, float]],
+    ) -> List[float]:
+        """Returns the haversine distances and counts them."""
+        self.count += len(positions1)
+        return haversine_km_batch(positions1, positions2)
+
+
+class TestAircraftRegistry:
+    """Class to group tests of the shared aircraft registry."""
+
+    def test_shared_states_and_distances(self) -> None:
+        """Test whether overlapping airspaces share states and segment distances."""
+        distance_function = CountingDistances()
+        registry = AircraftRegistry(distance_function)
+        region, metro = (
+            StateCarbonComputation(
+                name,
+                bounding_box,
+                carbon_estimator=get_assumed_carbon_by_aircraft,
+                registry=registry,
+            )
+            for name, bounding_box in [("region", REGION), ("metro", METRO)]
+        )
+
+        for request_time, states in make_cycles():
+            unchanged_states = copy.deepcopy(states)
+            region.get_co2_emission(states, request_time)
+            snapshot = registry.get_snapshot(METRO, request_time)
+            assert snapshot is None
+
+            registry.add_snapshot(REGION, request_time, states)
+            snapshot = registry.get_snapshot(METRO, request_time)
+            assert snapshot is not None
+            assert list(snapshot[1]) == ["3c6444"]
+            metro.get_co2_emission(copy.deepcopy(snapshot[1]), request_time)
+            assert states == unchanged_states
+
+        assert (
+            metro.aircrafts_in_airspace["3c6444"]
+            is region.aircrafts_in_airspace["3c6444"]
+        )
+        # four segments of two aircrafts, computed once for both airspaces
+        assert distance_function.count == 8
+
+    def test_shared_equals_separate(self) -> None:
+        """Test whether a shared registry does not change the emissions."""
+        registry = AircraftRegistry()
+        shared = [
+            StateCarbonComputation(
+                "metro",
+                METRO,
+                carbon_estimator=get_assumed_carbon_by_aircraft,
+                registry=registry,
+            )
+            for _ in range(2)
+        ]
+        separate = StateCarbonComputation(
+            "metro",
+            METRO,
+            carbon_estimator=get_assumed_carbon_by_aircraft,
+            registry=AircraftRegistry(),
+        )
+
+        # the metro airspace loses the aircraft after the last cycle
+        cycles = make_cycles()
+        cycles.append((cycles[-1][0] + 600, {}))
+        for request_time, states in cycles:
+            metro_states = {"3c6444": states["3c6444"]} if states else {}
+            expected = separate.get_co2_emission(
+                copy.deepcopy(metro_states), request_time
+            )
+            for computer in shared:
+                emission = computer.get_co2_emission(
+                    copy.deepcopy(metro_states), request_time
+                )
+                assert emission == expected
+        assert expected > 0
+
+    def test_snapshot_age_and_eviction(self) -> None:
+        """Test whether outdated snapshots are not used and old states evicted."""
+        registry = AircraftRegistry()
+        states = {"3c6444": make_state(1000, 52.5, 13.5)}
+        registry.add_snapshot(METRO, 1000, states)
+
+        assert registry.get_snapshot(METRO, 1000) == (1000, states)
+        assert registry.get_snapshot(METRO, 1001) is None
+        assert registry.get_snapshot(REGION, 0) is None
+
+        registry.ingest(states)
+        assert list(registry.states) == ["3c6444"]
+        registry.ingest({}, expiry_time=1001)
+        assert registry.states == {}
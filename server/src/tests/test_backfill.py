@@ -0,0 +1,93 @@
+import random
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from backfill import backfill_airspace, split_time_range, store_backfill
+from carbon_computation import StateCarbonComputation, get_assumed_carbon_by_aircraft
+from database import MemoryDatabase
+from state_archive import StateArchiveWriter
+
+BOUNDING_BOX = (52.0, 13.0, 53.0, 14.0)
+BEGIN = 1_688_515_200
+END = BEGIN + 6 * 3600
+
+
+def make_cycles() -> List[Tuple[int, Dict[str, Dict[str, Any]]]]:
+    """Returns cycles of aircrafts crossing the airspace, with gaps between cycles."""
+    rng = random.Random(0)
+    flights = [
+        (f"{index:06x}", BEGIN + rng.randrange(-1800, 6 * 3600), rng.uniform(0, 360))
+        for index in range(40)
+    ]
+    cycles = []
+    request_time = BEGIN - 1800
+    while request_time < END:
+        states = {}
+        for icao24, departure, true_track in flights:
+            minutes = (request_time - departure) / 60
+            # aircrafts are only seen in some cycles and stay 40 minutes
+            if 0 <= minutes < 40 and rng.random() < 0.8:
+                states[icao24] = {
+                    "last_update": request_time - rng.randrange(0, 30),
+                    "position": (52.1 + minutes * 0.02, 13.1 + minutes * 0.02),
+                    "on_ground": rng.random() < 0.05,
+                    "velocity": 230.0,
+                    "true_track": true_track,
+                }
+        cycles.append((request_time, states))
+        request_time += rng.choice([60, 60, 60, 240, 600])
+    return cycles
+
+
+class TestBackfill:
+    """Class to group tests of the parallel backfill."""
+
+    @pytest.fixture
+    def archive_dir(self, tmp_path: Any) -> str:
+        """Archive of cycles of the test airspace."""
+        writer = StateArchiveWriter(str(tmp_path), "Berlin")
+        for request_time, states in make_cycles():
+            writer.append(request_time, states)
+        return str(tmp_path)
+
+    def test_split_time_range(self) -> None:
+        """Test whether the chunks cover the time range without overlap."""
+        assert split_time_range(0, 10, 4) == [(0, 4), (4, 8), (8, 10)]
+        assert split_time_range(0, 0, 4) == []
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_backfill_equals_sequential(self, archive_dir: str, processes: int) -> None:
+        """Test whether chunked computation equals a single sequential computation."""
+        computer = StateCarbonComputation(
+            "Berlin", BOUNDING_BOX, carbon_estimator=get_assumed_carbon_by_aircraft
+        )
+        expected: Dict[int, float] = {}
+        total = 0.0
+        for request_time, states in make_cycles():
+            emission = computer.get_co2_emission(states, request_time)
+            if request_time >= BEGIN:
+                total += emission
+            point = (request_time // 3600 + 1) * 3600
+            if BEGIN < point <= END:
+                expected[point] = total
+
+        sequence, backfill_total = backfill_airspace(
+            archive_dir,
+            "Berlin",
+            BOUNDING_BOX,
+            BEGIN,
+            END,
+            chunk_seconds=1800,
+            processes=processes,
+        )
+        assert total > 0
+        assert list(sequence) == list(range(BEGIN + 3600, END + 1, 3600))
+        assert sequence == pytest.approx(expected)
+        assert backfill_total == pytest.approx(total)
+
+    def test_store_backfill(self) -> None:
+        """Test whether a backfilled sequence is stored as carbon sequence."""
+        db = MemoryDatabase()
+        store_backfill(db, "Berlin", {BEGIN: 1.0, BEGIN + 3600: 2.5})
+        assert db.get_carbon_sequence("Berlin", 0, 10) == {BEGIN: 1.0, BEGIN + 3600: 2.5}
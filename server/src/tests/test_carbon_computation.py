@@ -1,6 +1,8 @@
 import pytest
+from typing import Any
+from unittest.mock import patch
 
-from carbon_computation import StateCarbonComputation
+from carbon_computation import StateCarbonComputation, get_carbon_by_aircraft
 
 
 class TestCarbonComputation:
@@ -55,3 +57,26 @@ class TestCarbonComputation:
             -10.0,
         )
         assert computer.get_edge_position(true_track=315, position=(4, -8)) == (5.0, -9.0)
+
+    @patch("carbon_computation.get_flight_fuel_consumption")
+    def test_carbon_by_aircraft(self, mock_fuel_consumption: Any) -> None:
+        """Test whether the carbon emission is attributed to each aircraft."""
+        mock_fuel_consumption.return_value = [
+            {"icao24": "abc123", "co2": 100.0},
+            {"icao24": "def456", "co2": None},
+        ]
+        assert get_carbon_by_aircraft({"abc123": 10.0, "def456": 10.0}) == {
+            "abc123": 100.0,
+            "def456": 10.0 * 3.0 * 3.16,
+        }
+
+        # Aircrafts missing from a partial response use the assumed rate
+        mock_fuel_consumption.return_value = [{"icao24": "abc123", "co2": 100.0}]
+        assert get_carbon_by_aircraft({"abc123": 10.0, "def456": 10.0}) == {
+            "abc123": 100.0,
+            "def456": 10.0 * 3.0 * 3.16,
+        }
+
+        # Fall back to assumed fuel consumption rate without api response
+        mock_fuel_consumption.return_value = None
+        assert get_carbon_by_aircraft({"abc123": 10.0}) == {"abc123": 10.0 * 3.0 * 3.16}
@@ -0,0 +1,131 @@
+import pytest
+from datetime import datetime
+from typing import Iterator
+
+from database import Database, MemoryDatabase, SQLiteDatabase
+
+
+class TestDatabase:
+    """Class to group tests of the database backends without database server."""
+
+    @pytest.fixture(params=["memory", "sqlite"])
+    def db(self, request: pytest.FixtureRequest) -> Iterator[Database]:
+        """Initialize an empty database of each embedded backend."""
+        if request.param == "memory":
+            yield MemoryDatabase()
+        else:
+            yield SQLiteDatabase(":memory:")
+
+    def test_airspaces_and_totals(self, db: Database) -> None:
+        """Test storing airspaces, totals and the server startup time."""
+        assert db.get_server_startup_time() == 0
+        db.set_server_startup_time(datetime.fromtimestamp(1688570053))
+        assert db.get_server_startup_time() == 1688570053
+
+        db.set_airspaces({"berlin": (52.3, 13.0, 52.6, 13.7)})
+        db.set_airspaces({"paris": (48.7, 2.1, 48.9, 2.4)})
+        assert db.get_airspaces() == {
+            "berlin": (52.3, 13.0, 52.6, 13.7),
+            "paris": (48.7, 2.1, 48.9, 2.4),
+        }
+
+        assert db.get_total_carbon("berlin") == 0.0
+        db.set_total_carbon("berlin", 12.5)
+        assert db.get_total_carbon("berlin") == 12.5
+
+    def test_carbon_sequence(self, db: Database) -> None:
+        """Test whether carbon sequences are ranged like redis sorted sets."""
+        for timestamp, value in [(1000, 10.0), (2000, 20.0), (3000, 30.0)]:
+            db.set_carbon_timestamp("berlin", datetime.fromtimestamp(timestamp), value)
+
+        assert db.get_carbon_sequence("berlin", 0, 100) == {
+            1000: 10.0,
+            2000: 20.0,
+            3000: 30.0,
+        }
+        assert db.get_carbon_sequence("berlin", 15, 25) == {2000: 20.0}
+        assert db.get_carbon_sequence("paris", 0, 100) == {}
+
+        db.set_carbon_timestamps(
+            "berlin",
+            {datetime.fromtimestamp(3000): 35.0, datetime.fromtimestamp(4000): 40.0},
+        )
+        assert db.get_latest_carbon_sequence("berlin", 2) == {3000: 35.0, 4000: 40.0}
+
+    def test_state_snapshots(self, db: Database) -> None:
+        """Test whether the latest state snapshot of every airspace is kept."""
+        states = {
+            "3c6444": {
+                "last_update": 990,
+                "position": (52.5, 13.4),
+                "on_ground": False,
+                "velocity": 220.5,
+                "true_track": 87.2,
+            }
+        }
+        assert db.get_state_snapshots() == {}
+        db.set_state_snapshot("berlin", 900, {})
+        db.set_state_snapshot("berlin", 1000, states)
+        db.set_state_snapshot("paris", 1000, {})
+        assert db.get_state_snapshots() == {"berlin": (1000, states), "paris": (1000, {})}
+
+    def test_aircraft_ledger(self, db: Database) -> None:
+        """Test top-N and history queries of the per-aircraft emission ledger."""
+        db.add_aircraft_emissions(
+            "berlin", datetime.fromtimestamp(3600), {"a": 1.0, "b": 5.0}
+        )
+        db.add_aircraft_emissions("berlin", datetime.fromtimestamp(3700), {"a": 2.0})
+        db.add_aircraft_emissions(
+            "berlin", datetime.fromtimestamp(7300), {"a": 4.0, "c": 3.0}
+        )
+
+        assert db.get_top_aircraft_emissions("berlin", 3600, 3600, 10) == [
+            ("b", 5.0),
+            ("a", 3.0),
+        ]
+        assert db.get_top_aircraft_emissions("berlin", 0, 10000, 2) == [
+            ("a", 7.0),
+            ("b", 5.0),
+        ]
+        assert db.get_top_aircraft_emissions("paris", 0, 10000, 2) == []
+        assert db.get_aircraft_emission_history("berlin", "a", 0, 10000) == {
+            3600: 3.0,
+            7200: 4.0,
+        }
+        assert db.get_aircraft_emission_history("berlin", "a", 7300, 10000) == {7200: 4.0}
+
+    def test_celeb_emissions(self, db: Database) -> None:
+        """Test storing the carbon emission of celebrities."""
+        db.set_celeb_emissions({"Bill Gates": 10.0, "Elon Musk": 20.0})
+        db.set_celeb_emissions({"Elon Musk": 30.0})
+        assert db.get_celeb_emissions() == {"Bill Gates": 10.0, "Elon Musk": 30.0}
+
+    def test_settings(self, db: Database) -> None:
+        """Test setting, replacing and removing runtime settings."""
+        assert db.get_setting("profiling") is None
+        db.set_setting("profiling", "a")
+        db.set_setting("profiling", "b")
+        assert db.get_setting("profiling") == "b"
+        db.set_setting("profiling", None)
+        assert db.get_setting("profiling") is None
+
+    def test_airspace_summaries(self, db: Database) -> None:
+        """Test whether summaries contain box, total and latest carbon values."""
+        db.set_airspaces({"berlin": (52.3, 13.0, 52.6, 13.7)})
+        db.set_total_carbon("berlin", 30.0)
+        for timestamp, value in [(1000, 10.0), (2000, 20.0), (3000, 30.0)]:
+            db.set_carbon_timestamp("berlin", datetime.fromtimestamp(timestamp), value)
+
+        assert db.get_latest_carbon_sequence("berlin", 2) == {2000: 20.0, 3000: 30.0}
+        assert db.get_airspace_summaries(["berlin", "unknown"], 1) == {
+            "berlin": {
+                "bounding_box": (52.3, 13.0, 52.6, 13.7),
+                "total": 30.0,
+                "data": {3000: 30.0},
+            }
+        }
+        assert db.get_airspace_summaries()["berlin"]["data"] == {
+            1000: 10.0,
+            2000: 20.0,
+            3000: 30.0,
+        }
@@ -0,0 +1,62 @@
+import pytest
+from datetime import datetime
+from typing import Iterator
+
+from database import Database, MemoryDatabase, SQLiteDatabase
+from emission_stream import HourlySnapshotConsumer, TotalEmissionConsumer
+
+
+class TestEmissionStream:
+    """Class to group tests of the emission event stream and its consumers."""
+
+    @pytest.fixture(params=["memory", "sqlite"])
+    def db(self, request: pytest.FixtureRequest) -> Iterator[Database]:
+        """Initialize an empty database of each embedded backend."""
+        if request.param == "memory":
+            yield MemoryDatabase()
+        else:
+            yield SQLiteDatabase(":memory:")
+
+    def test_consumer_groups(self, db: Database) -> None:
+        """Test whether groups see all events and consumers share a group."""
+        db.create_emission_consumer_group("a")
+        db.create_emission_consumer_group("b")
+        for timestamp in range(3):
+            db.append_emission_event(
+                "berlin", datetime.fromtimestamp(timestamp), 1.0, timestamp, {}
+            )
+
+        first = db.read_emission_events("a", "first", count=2)
+        second = db.read_emission_events("a", "second", count=2)
+        assert [event["total"] for _, event in first] == [0.0, 1.0]
+        assert [event["total"] for _, event in second] == [2.0]
+        assert len(db.read_emission_events("b", "first")) == 3
+
+        # Unacknowledged events stay pending for their consumer
+        db.ack_emission_events("a", [first[0][0]])
+        pending = db.read_emission_events("a", "first", pending=True)
+        assert pending == first[1:]
+        assert db.read_emission_events("a", "first") == []
+
+    def test_consumers(self, db: Database) -> None:
+        """Test whether consumers derive totals, ledger and hourly snapshots."""
+        totals = TotalEmissionConsumer(db)
+        snapshots = HourlySnapshotConsumer(db)
+        for timestamp, total in [(3500, 1.0), (3560, 3.0), (3620, 6.0)]:
+            db.append_emission_event(
+                "berlin",
+                datetime.fromtimestamp(timestamp),
+                1.0,
+                total,
+                {"abc123": 1.0},
+            )
+
+        assert totals.consume() == 3
+        assert totals.consume() == 0
+        assert snapshots.consume() == 3
+        assert db.get_total_carbon("berlin") == 6.0
+        assert db.get_aircraft_emission_history("berlin", "abc123", 0, 7200) == {
+            0: 2.0,
+            3600: 1.0,
+        }
+        assert db.get_carbon_sequence("berlin", 0, 10) == {3620: 6.0}
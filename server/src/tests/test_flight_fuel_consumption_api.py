@@ -0,0 +1,129 @@
+import time
+from threading import Semaphore
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+import flight_fuel_consumption_api
+from flight_fuel_consumption_api import (
+    CircuitBreaker,
+    _get_url,
+    get_flight_fuel_consumption,
+    split_into_chunks,
+)
+
+
+class TestFlightFuelConsumptionApi:
+    """Class to group tests of the circuit breaker of the fuel consumption api."""
+
+    def test_breaker_states(self) -> None:
+        """Test opening, fast failing and half-open probing of the breaker."""
+        breaker = CircuitBreaker(
+            window=4, failure_rate=0.5, min_calls=4, open_seconds=0.05
+        )
+        for success in [True, False, True]:
+            assert breaker.allow_request()
+            breaker.record(success)
+        assert breaker.get_stats()["state"] == "closed"
+
+        assert breaker.allow_request()
+        breaker.record(False)
+        assert breaker.get_stats()["state"] == "open"
+        assert not breaker.allow_request()
+
+        # a single probe is let through after the open time, failing reopens
+        time.sleep(0.06)
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record(False)
+        assert not breaker.allow_request()
+
+        time.sleep(0.06)
+        assert breaker.allow_request()
+        breaker.record(True)
+        assert breaker.get_stats() == {
+            "state": "closed",
+            "recent_calls": 0,
+            "recent_failures": 0,
+            "rejected": 3,
+        }
+
+    def test_budget_and_fast_fail(self) -> None:
+        """Test whether callers wait at most their budget and not while open."""
+        calls: List[Dict[str, float]] = []
+        finished = Semaphore(0)
+
+        def slow_request(icao24_distance: Dict[str, float]) -> Optional[Any]:
+            calls.append(icao24_distance)
+            time.sleep(0.5)
+            finished.release()
+            return [{"icao24": "3c6444", "co2": 1.0}]
+
+        breaker = CircuitBreaker(window=2, min_calls=2, open_seconds=60)
+        with (
+            patch.object(flight_fuel_consumption_api, "FUEL_API_BREAKER", breaker),
+            patch.object(
+                flight_fuel_consumption_api,
+                "_request_flight_fuel_consumption",
+                slow_request,
+            ),
+        ):
+            start = time.perf_counter()
+            for _ in range(4):
+                assert get_flight_fuel_consumption({"3c6444": 10.0}, budget=0.05) is None
+            elapsed = time.perf_counter() - start
+
+        # two calls exceed the budget and open the breaker, then calls fail fast
+        assert len(calls) == 2
+        assert elapsed < 0.3
+        assert breaker.get_stats()["state"] == "open"
+
+        # the abandoned requests still finish in the background
+        for _ in calls:
+            assert finished.acquire(timeout=5)
+
+    def test_split_into_chunks(self) -> None:
+        """Test whether chunks keep every flight once within the URL length."""
+        icao24_distance = {f"{index:06x}": index * 1.23456 for index in range(500)}
+        chunks = split_into_chunks(icao24_distance, max_url_length=300)
+
+        assert len(chunks) > 1
+        assert all(len(_get_url(chunk)) <= 300 for chunk in chunks)
+        assert {
+            icao24: distance for chunk in chunks for icao24, distance in chunk.items()
+        } == icao24_distance
+
+        # a single flight exceeding the length still gets its own chunk
+        assert split_into_chunks({"3c6444": 1.0}, max_url_length=10) == [{"3c6444": 1.0}]
+        assert split_into_chunks({}) == []
+
+    def test_concurrent_chunks(self) -> None:
+        """Test whether chunks are requested concurrently and their results merged."""
+        icao24_distance = {f"{index:06x}": 10.0 for index in range(400)}
+        failing = next(iter(icao24_distance))
+
+        def request(chunk: Dict[str, float]) -> Optional[Any]:
+            time.sleep(0.1)
+            if failing in chunk:
+                return None
+            # duplicates in responses are merged
+            return [{"icao24": icao24, "co2": 1.0} for icao24 in chunk] * 2
+
+        breaker = CircuitBreaker(window=100)
+        with (
+            patch.object(flight_fuel_consumption_api, "FUEL_API_BREAKER", breaker),
+            patch.object(
+                flight_fuel_consumption_api, "_request_flight_fuel_consumption", request
+            ),
+        ):
+            start = time.perf_counter()
+            flights = get_flight_fuel_consumption(icao24_distance, budget=1.0)
+            elapsed = time.perf_counter() - start
+
+        chunks = split_into_chunks(icao24_distance)
+        assert len(chunks) > 2
+        assert elapsed < 0.1 * len(chunks)
+        assert flights is not None
+        icao24s = [flight["icao24"] for flight in flights]
+        assert len(icao24s) == len(set(icao24s))
+        assert set(icao24s) == set(icao24_distance) - set(chunks[0])
+        assert breaker.get_stats()["recent_failures"] == 1
@@ -0,0 +1,57 @@
+import random
+from typing import List, Tuple
+from geopy import distance as geopy_distance  # type: ignore
+
+from geodesy import LocalProjection, haversine_km, haversine_km_batch, km_to_nautical
+
+
+class TestGeodesy:
+    """Class to group tests of the geodesy module against geopy."""
+
+    bounding_boxes = [
+        (52.3418234221, 13.0882097323, 52.6697240587, 13.7606105539),
+        (-5.0, -10.0, 5.0, 10.0),
+        (45.0, 0.0, 55.0, 15.0),
+    ]
+
+    def random_positions(
+        self, bounding_box: Tuple[float, float, float, float], count: int
+    ) -> List[Tuple[float, float]]:
+        """Returns random positions within the bounding box."""
+        generator = random.Random(42)
+        return [
+            (
+                generator.uniform(bounding_box[0], bounding_box[2]),
+                generator.uniform(bounding_box[1], bounding_box[3]),
+            )
+            for _ in range(count)
+        ]
+
+    def test_haversine(self) -> None:
+        """Test whether haversine distances equal geopy great circle distances."""
+        for bounding_box in self.bounding_boxes:
+            positions1 = self.random_positions(bounding_box, 200)
+            positions2 = list(reversed(positions1))
+            distances = haversine_km_batch(positions1, positions2)
+            for position1, position2, distance in zip(positions1, positions2, distances):
+                expected = geopy_distance.great_circle(position1, position2).km
+                assert abs(distance - expected) <= 1e-9 * max(expected, 1.0)
+                assert distance == haversine_km(*position1, *position2)
+
+    def test_local_projection_error_bound(self) -> None:
+        """Test whether planar distances stay within the projection error bound."""
+        for bounding_box in self.bounding_boxes:
+            projection = LocalProjection(bounding_box)
+            max_error = projection.max_relative_error
+            positions1 = self.random_positions(bounding_box, 200)
+            positions2 = list(reversed(positions1))
+            distances = projection.distance_km_batch(positions1, positions2)
+            for position1, position2, distance in zip(positions1, positions2, distances):
+                expected = geopy_distance.great_circle(position1, position2).km
+                assert abs(distance - expected) <= max_error * expected
+
+        assert LocalProjection(self.bounding_boxes[0]).max_relative_error < 1e-4
+
+    def test_km_to_nautical(self) -> None:
+        """Test the unit conversion against geopy."""
+        assert km_to_nautical(100.0) == geopy_distance.Distance(kilometers=100.0).nautical
@@ -0,0 +1,67 @@
+from typing import Any, List
+from unittest.mock import patch
+
+from job_queue import JobQueue
+
+
+class FakeClock:
+    """Monotonic clock advanced manually by the tests."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Returns the current time."""
+        return self.now
+
+
+class TestJobQueue:
+    """Class to group tests of the coalescing job queue."""
+
+    @patch("job_queue.time.monotonic", new_callable=FakeClock)
+    def test_coalescing_and_lag(self, clock: Any) -> None:
+        """Test whether waiting jobs with the same key are merged."""
+        queue = JobQueue()
+        queue.put("berlin 1", key=("state_computation", "berlin"))
+        queue.put("paris 1", key=("state_computation", "paris"))
+        clock.now += 60
+        queue.put("berlin 2", key=("state_computation", "berlin"))
+        queue.put("unkeyed", max_delay=1)
+        queue.put("unkeyed")
+
+        assert queue.qsize() == 4
+        assert queue.get_lag() == {
+            ("state_computation", "berlin"): 60.0,
+            ("state_computation", "paris"): 60.0,
+        }
+
+        # the merged job keeps its position and runs with the latest arguments
+        clock.now += 1
+        items: List[Any] = [queue.get() for _ in range(4)]
+        assert items == ["berlin 2", "paris 1", "unkeyed", "unkeyed"]
+        assert queue.get_lag()[("state_computation", "berlin")] == 61.0
+
+        metrics = queue.get_metrics()
+        assert metrics["put"] == 5
+        assert metrics["coalesced"] == 1
+        assert metrics["started"] == 4
+        assert metrics["waiting"] == 0
+
+    @patch("job_queue.time.monotonic", new_callable=FakeClock)
+    def test_stale_and_overflow(self, clock: Any) -> None:
+        """Test whether stale jobs are dropped and jobs of a full queue rejected."""
+        queue = JobQueue(maxsize=2)
+        assert queue.put("stale", key="a", max_delay=60)
+        assert queue.put("fresh", key="b", max_delay=60)
+        assert not queue.put("rejected", key="c")
+
+        clock.now += 30
+        # merging renews the deadline of the merged job
+        assert queue.put("renewed", key="b", max_delay=60)
+        clock.now += 31
+        assert queue.get() == "renewed"
+
+        metrics = queue.get_metrics()
+        assert metrics["stale"] == 1
+        assert metrics["overflow"] == 1
+        assert metrics["waiting"] == 0
@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 import threading
 import schedule
 import time
@@ -30,7 +33,7 @@ def ctype_async_raise(target_tid, exception):
 
 
 @typing.no_type_check
-def mock_update_total_co2_emission_job(username, password, carbon_computer):
+def mock_update_total_co2_emission_job(db, account_pool, carbon_computer, **kwargs):
     """Mocks the update_total_co2_emission_job function."""
     print(f"Thread {threading.current_thread().ident} - calculating co2 emission")
     time.sleep(2)
@@ -104,3 +107,19 @@ class TestMain:
 
         for airspace, job_count in jobs_per_airspace.items():
             assert job_count == 2
+
+    def test_lazy_imports(self) -> None:
+        """Checks whether heavy dependencies are only imported on first use."""
+        script = (
+            "import sys, main, backfill; "
+            "print(*[module for module in ('redis', 'requests', 'schedule') "
+            "if module in sys.modules])"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=os.path.join(os.path.dirname(__file__), os.pardir),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        assert output.strip() == ""
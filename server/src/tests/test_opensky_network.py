@@ -0,0 +1,132 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from unittest.mock import patch
+
+from opensky_network import (
+    OpenSkyAccountPool,
+    _StateVectorStream,
+    _transform_state_vector,
+    get_states_credits,
+    get_states_of_bounding_box,
+)
+
+STATES = [
+    ["3c6444", "DLH9LF ", "Germany", 1688570063, 1688570063, 13.41, 52.52, 1000.0,
+     False, 220.5, 87.2, 1.0, None, 1100.0, "1000", False, 0],
+    ["4b1805", "SWR3ZL ", "Switzerland", 1688570060, 1688570061, None, None, None,
+     True, 0.0, 0.0, None, None, None, None, False, 0],
+    ["a835af", "N628TS ", "United States", 1688570062, 1688570062, -3.70, 40.42,
+     11000.5, False, 250.0, 270.0, -0.5, None, 11200.0, None, False, 0],
+]  # fmt: skip
+
+
+class FakeResponse:
+    """Streamed response with the content split into small chunks."""
+
+    def __init__(self, content: bytes, chunk_size: int) -> None:
+        self.ok = True
+        self.status_code = 200
+        self.headers = {"X-Rate-Limit-Remaining": "3999"}
+        self.content = content
+        self.chunk_size = chunk_size
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        """Yields the content in chunks of the fixed chunk size."""
+        for start in range(0, len(self.content), self.chunk_size):
+            yield self.content[start : start + self.chunk_size]
+
+
+class TestOpenskyNetwork:
+    """Class to group tests of the OpenSky Network api functions."""
+
+    def parse(self, text: str, chunk_size: int) -> List[List[Any]]:
+        """Parses text in chunks and returns the streamed state vectors."""
+        parser = _StateVectorStream()
+        states: List[List[Any]] = []
+        for start in range(0, len(text), chunk_size):
+            states.extend(parser.feed(text[start : start + chunk_size]))
+        parser.close()
+        return states
+
+    def test_stream_parser(self) -> None:
+        """Test whether streamed state vectors equal the fully decoded ones."""
+        text = json.dumps({"time": 1688570063, "states": STATES, "extra": [1, {}]})
+        for chunk_size in range(1, len(text) + 1):
+            assert self.parse(text, chunk_size) == STATES
+
+        parser = _StateVectorStream()
+        list(parser.feed(json.dumps({"states": None, "time": 12})))
+        parser.close()
+        assert parser.fields == {"states": None, "time": 12}
+
+    @patch("requests.get")
+    def test_get_states_of_bounding_box(self, mock_get: Any) -> None:
+        """Test whether the streamed response is transformed like the full one."""
+        content = json.dumps({"time": 1688570063, "states": STATES}).encode()
+        mock_get.return_value = FakeResponse(content, 7)
+        assert get_states_of_bounding_box("user", "password", (0, 0, 1, 1)) == {
+            "time": 1688570063,
+            "states": _transform_state_vector(STATES),
+        }
+
+        mock_get.return_value = FakeResponse(content[:-5], 7)
+        assert get_states_of_bounding_box("user", "password", (0, 0, 1, 1)) is None
+
+        mock_get.return_value = FakeResponse(b'{"time": 1, "states": null}', 7)
+        assert get_states_of_bounding_box("user", "password", (0, 0, 1, 1)) is None
+
+    def test_account_pool_config(self) -> None:
+        """Test whether the pool contains every account with credentials once."""
+        account = {"username": "user", "password": "password"}
+        for config in [
+            {"berlin": account, "paris": account, "madrid": {"username": "other"}},
+            [account, account, {"username": "", "password": "password"}],
+        ]:
+            pool = OpenSkyAccountPool.from_config(config)  # type: ignore
+            assert [account.username for account in pool.accounts] == ["user"]
+
+        assert get_states_credits((52.3, 13.0, 52.7, 13.8)) == 1
+        assert get_states_credits((40.0, -10.0, 50.0, 5.0)) == 3
+
+    @patch("opensky_network._request_states")
+    def test_account_pool_failover(self, mock_request: Any) -> None:
+        """Test load balancing by remaining credits and failover when throttled."""
+        remaining = {"a": 100, "b": 300, "c": 200}
+        throttled = {"b"}
+        requested: List[str] = []
+
+        def request_states(
+            username: str, password: str, bounding_box: Tuple
+        ) -> Tuple[int, Dict[str, str], Optional[Dict]]:
+            requested.append(username)
+            if username in throttled:
+                return 429, {"X-Rate-Limit-Retry-After-Seconds": "3600"}, None
+            remaining[username] -= 1
+            headers = {"X-Rate-Limit-Remaining": str(remaining[username])}
+            return 200, headers, {"time": 1, "states": {}}
+
+        mock_request.side_effect = request_states
+        pool = OpenSkyAccountPool.from_config(
+            [{"username": name, "password": "password"} for name in remaining]
+        )
+
+        # all accounts start with the daily credits, then b is rate limited
+        assert pool.get_states_of_bounding_box((0, 0, 1, 1)) is not None
+        assert requested == ["a"]
+        assert pool.get_states_of_bounding_box((0, 0, 1, 1)) is not None
+        assert requested == ["a", "b", "c"]
+
+        # a has fewer credits left than c, b is not used until its retry time
+        requested.clear()
+        for _ in range(3):
+            pool.get_states_of_bounding_box((0, 0, 1, 1))
+        assert requested == ["c", "c", "c"]
+        stats = pool.get_stats()
+        assert stats["b"]["rate_limited"] == 1
+        assert stats["b"]["throttled_seconds"] > 3500
+        assert stats["c"]["remaining_credits"] == 196
+
+        throttled.update(remaining)
+        assert pool.get_states_of_bounding_box((0, 0, 1, 1)) is None
+        assert pool.get_states_of_bounding_box((0, 0, 1, 1)) is None
+        assert len(requested) == 5
@@ -0,0 +1,80 @@
+import os
+import pstats
+import time
+from pathlib import Path
+
+from database import MemoryDatabase
+from profiling import Profiler, request_profiling, stop_profiling
+
+
+def busy_job(seconds: float) -> float:
+    """Keeps the thread busy for some seconds and returns the elapsed time."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        pass
+    return time.perf_counter() - start
+
+
+class TestProfiling:
+    """Class to group tests of the profiling of jobs and routes."""
+
+    def test_sample_requested_runs(self, tmp_path: Path) -> None:
+        """Test whether only the requested number of runs of targets is sampled."""
+        db = MemoryDatabase()
+        profiler = Profiler(db, str(tmp_path), poll_seconds=0)
+        berlin_job = profiler.wrap(busy_job, "job:state_computation:berlin")
+        celeb_job = profiler.wrap(busy_job, "job:celeb_computation")
+
+        # without profiling request
+        profiler.refresh()
+        assert berlin_job(0.01) >= 0.01
+        assert os.listdir(tmp_path) == []
+
+        request_profiling(db, ["job:state_computation"], runs=2, interval=0.001)
+        profiler.refresh()
+        for _ in range(3):
+            berlin_job(0.05)
+            celeb_job(0.01)
+
+        profiles = sorted(os.listdir(tmp_path))
+        assert len(profiles) == 2
+        assert all(
+            profile.startswith("job_state_computation_berlin-")
+            and profile.endswith(".folded")
+            for profile in profiles
+        )
+        with open(tmp_path / profiles[0]) as file:
+            lines = file.read().splitlines()
+        assert lines
+        assert any("busy_job (test_profiling.py" in line for line in lines)
+        assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+
+        # runs are counted per request
+        profiler.refresh()
+        berlin_job(0.01)
+        assert len(os.listdir(tmp_path)) == 2
+
+        stop_profiling(db)
+        profiler.refresh()
+        assert profiler.targets == []
+
+    def test_trace(self, tmp_path: Path) -> None:
+        """Test whether traced runs are written as pstats files."""
+        db = MemoryDatabase()
+        profiler = Profiler(db, str(tmp_path), poll_seconds=0)
+        request_profiling(db, ["route:/api/{airspace}/total"], runs=1, mode="trace")
+        profiler.refresh()
+
+        with profiler.profile("route:/api/{airspace}/total"):
+            busy_job(0.01)
+
+        (profile,) = os.listdir(tmp_path)
+        assert profile.endswith(".prof")
+        stats = pstats.Stats(str(tmp_path / profile))
+        assert any(function[2] == "busy_job" for function in stats.stats)  # type: ignore
+
+    def test_claim_refresh(self, tmp_path: Path) -> None:
+        """Test whether the request is read once per poll interval."""
+        profiler = Profiler(MemoryDatabase(), str(tmp_path), poll_seconds=60)
+        assert profiler.claim_refresh()
+        assert not profiler.claim_refresh()
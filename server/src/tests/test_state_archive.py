@@ -0,0 +1,99 @@
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from carbon_computation import StateCarbonComputation, get_assumed_carbon_by_aircraft
+from state_archive import (
+    CHUNK_SECONDS,
+    StateArchiveReader,
+    StateArchiveWriter,
+    replay_states,
+)
+
+BOUNDING_BOX = (52.0, 13.0, 53.0, 14.0)
+START = 1_688_515_200 - 3 * 60  # three cycles before a chunk boundary
+
+
+def make_cycles(count: int) -> List[Tuple[int, Dict[str, Dict[str, Any]]]]:
+    """Returns cycles of two aircrafts flying east through the airspace."""
+    cycles = []
+    for index in range(count):
+        request_time = START + index * 60
+        cycles.append(
+            (
+                request_time,
+                {
+                    icao24: {
+                        "last_update": request_time,
+                        "position": (52.2 + offset, 13.1 + index * 0.05),
+                        "on_ground": False,
+                        "velocity": 230.0,
+                        "true_track": 90.0,
+                    }
+                    for offset, icao24 in ((0.0, "3c6444"), (0.4, "4b1805"))
+                },
+            )
+        )
+    return cycles
+
+
+class TestStateArchive:
+    """Class to group tests of the state vector archive."""
+
+    @pytest.fixture
+    def cycles(self) -> List[Tuple[int, Dict[str, Dict[str, Any]]]]:
+        """Cycles spanning a chunk boundary."""
+        return make_cycles(8)
+
+    @pytest.fixture
+    def reader(
+        self, tmp_path: Any, cycles: List[Tuple[int, Dict[str, Dict[str, Any]]]]
+    ) -> StateArchiveReader:
+        """Archive containing all cycles."""
+        writer = StateArchiveWriter(str(tmp_path), "Berlin")
+        for request_time, states in cycles:
+            writer.append(request_time, states)
+        return StateArchiveReader(str(tmp_path), "Berlin")
+
+    def test_round_trip(
+        self,
+        reader: StateArchiveReader,
+        cycles: List[Tuple[int, Dict[str, Dict[str, Any]]]],
+    ) -> None:
+        """Test whether archived cycles are read back unchanged across chunks."""
+        assert len(reader.chunks()) == 2
+        assert reader.chunks()[1] - reader.chunks()[0] == CHUNK_SECONDS
+        assert list(reader.iter_cycles(0, 2**62)) == cycles
+        assert reader.time_range() == (cycles[0][0], cycles[-1][0])
+
+    def test_time_range_reads(
+        self,
+        reader: StateArchiveReader,
+        cycles: List[Tuple[int, Dict[str, Dict[str, Any]]]],
+    ) -> None:
+        """Test whether only cycles within the requested time range are read."""
+        begin, end = cycles[1][0], cycles[5][0]
+        assert list(reader.iter_cycles(begin, end)) == cycles[1:6]
+        assert list(reader.iter_cycles(begin + 1, end - 1)) == cycles[2:5]
+        assert list(reader.iter_cycles(0, START - 1)) == []
+        assert StateArchiveReader(reader.directory, "unknown").time_range() is None
+
+    def test_replay(
+        self,
+        reader: StateArchiveReader,
+        cycles: List[Tuple[int, Dict[str, Dict[str, Any]]]],
+    ) -> None:
+        """Test whether replaying the archive equals the direct computation."""
+        direct = StateCarbonComputation(
+            "Berlin", BOUNDING_BOX, carbon_estimator=get_assumed_carbon_by_aircraft
+        )
+        expected = [
+            (request_time, direct.get_co2_emission(states, request_time))
+            for request_time, states in cycles
+        ]
+
+        replayed = StateCarbonComputation(
+            "Berlin", BOUNDING_BOX, carbon_estimator=get_assumed_carbon_by_aircraft
+        )
+        assert list(replay_states(reader, replayed, 0, 2**62)) == expected
+        assert any(emission > 0 for _, emission in expected)